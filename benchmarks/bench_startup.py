@@ -0,0 +1,112 @@
+"""Startup benchmark: how long CLI subcommands take end to end, and what `import main` pulls in.
+
+Run from the repository root:  python benchmarks/bench_startup.py [runs]
+Each command in COMMANDS runs as `python main.py ...` against a throwaway HOME seeded
+with SEED_DAYS entries. Exits non-zero when a command's median wall time exceeds the
+budget or a deferred dependency is imported at startup, so it can guard against regressions.
+
+The budget is the 100 ms the subcommands aim for. rich.console is the one heavy
+import left, since every command prints through it; it alone is 60-80 ms on a slow
+machine, so the report shows its share to tell StandLog's own cost from rich's.
+"""
+import os
+import re
+import json
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STARTUP_BUDGET_MS = 100
+# Loaded only by the features that need them
+DEFERRED_MODULES = ["sounddevice", "yagmail", "scipy", "numpy", "ics", "cryptography",
+                    "speech_recognition", "soundfile", "subprocess", "platform",
+                    "concurrent", "rich.table", "rich.progress", "ui.pomodoro"]
+IMPORTTIME_RE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+SEED_DAYS = 60
+# The search term is in every tenth entry, so the search prints a handful of panels
+COMMANDS = [["stats"], ["search", "migration"], ["view", str(date.today() - timedelta(days=1))]]
+
+
+def seed_home():
+    """A temporary HOME with SEED_DAYS plain entries, indexed by one warm-up run"""
+    home = tempfile.mkdtemp(prefix="standlog-bench-")
+    entries = os.path.join(home, ".standlog", "entries")
+    os.makedirs(entries)
+    for offset in range(1, SEED_DAYS + 1):
+        day = str(date.today() - timedelta(days=offset))
+        topic = "the database migration" if offset % 10 == 0 else "the release checklist"
+        entry = {"did": f"Worked on {topic}, day {offset}", "will_do": "Review open PRs",
+                 "blockers": "flaky CI" if offset % 5 == 0 else "", "tags": ["release"], "notes": "",
+                 "time_spent": 30 + offset % 90, "date": day}
+        with open(os.path.join(entries, f"{day}.json"), "w") as f:
+            json.dump(entry, f, indent=2)
+    run_command(home, COMMANDS[0])
+    return home
+
+
+def run_command(home, args):
+    """Run `python main.py args` once; return its wall time in ms"""
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, "main.py", *args], cwd=REPO_ROOT,
+                            env=dict(os.environ, HOME=home), capture_output=True, text=True)
+    elapsed = (time.perf_counter() - start) * 1000
+    if result.returncode != 0:
+        sys.exit(f"main.py {' '.join(args)} failed:\n{result.stderr}")
+    return elapsed
+
+
+def measure():
+    """Import main once in a fresh interpreter; return ({module: cumulative us}, [top-level names])"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=REPO_ROOT, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        sys.exit(f"import main failed:\n{result.stderr}")
+    cumulative = {}
+    modules = []
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_RE.match(line)
+        if match:
+            cumulative[match.group(4)] = int(match.group(2))
+            modules.append(match.group(4))
+    return cumulative, modules
+
+
+def main(runs=5):
+    failed = False
+    home = seed_home()
+    try:
+        for args in COMMANDS:
+            median = statistics.median(run_command(home, args) for _ in range(runs))
+            print(f"main.py {' '.join(args):<20} median {median:6.1f} ms over {runs} runs (budget {STARTUP_BUDGET_MS} ms)")
+            if median > STARTUP_BUDGET_MS:
+                print(f"FAIL: over budget by {median - STARTUP_BUDGET_MS:.1f} ms")
+                failed = True
+    finally:
+        shutil.rmtree(home, ignore_errors=True)
+    samples = []
+    rich_samples = []
+    for _ in range(runs):
+        cumulative, modules = measure()
+        samples.append(cumulative["main"] / 1000)
+        rich_samples.append(cumulative.get("rich.console", 0) / 1000)
+    print(f"import main: median {statistics.median(samples):.1f} ms, "
+          f"of which rich.console {statistics.median(rich_samples):.1f} ms")
+    heaviest = sorted(((us, name) for name, us in cumulative.items() if name.startswith("ui.")), reverse=True)
+    for us, name in heaviest[:5]:
+        print(f"  {name:<20} {us / 1000:6.1f} ms")
+    loaded = sorted({name for name in modules if name in DEFERRED_MODULES or name.split(".")[0] in DEFERRED_MODULES})
+    if loaded:
+        print(f"FAIL: deferred modules imported at startup: {', '.join(loaded)}")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(int(sys.argv[1]) if len(sys.argv) > 1 else 5))
@@ -1,18 +1,14 @@
-from ui.viewer import viewer_menu, reminder
-from ui.pomodoro import pomodoro_menu
+from ui.viewer import viewer_menu, reminder, load_entry
+from ui.index import get_indexed_entries, index_entry
+from ui.search import search
+from ui.streaks import get_streaks
+from ui.storage import write_json, read_json, batch
 from rich.console import Console
 from rich.panel import Panel
 from rich.prompt import Prompt
 from datetime import datetime
 import os
 import json
-import yagmail
-import sounddevice as sd
-from scipy.io.wavfile import write, read as wavread
-import tempfile
-import shutil
-import re
-from collections import defaultdict
 
 DATA_DIR = os.path.expanduser("~/.standlog/entries")
 GOALS_PATH = os.path.expanduser("~/.standlog/goals.json")
@@ -20,7 +16,6 @@ BADGES_PATH = os.path.expanduser("~/.standlog/badges.json")
 EMAIL_CONFIG_PATH = os.path.expanduser("~/.standlog/email.json")
 VOICE_DIR = os.path.expanduser("~/.standlog/voice_notes")
 AUTOMATION_RULES_PATH = os.path.expanduser("~/.standlog/automation_rules.json")
-os.makedirs(VOICE_DIR, exist_ok=True)
 console = Console()
 
 
@@ -46,14 +41,10 @@ def multiline_input(prompt):
     return "\n".join(lines)
 
 def load_badges():
-    if not os.path.exists(BADGES_PATH):
-        return {}
-    with open(BADGES_PATH) as f:
-        return json.load(f)
+    return read_json(BADGES_PATH, {})
 
 def save_badges(badges):
-    with open(BADGES_PATH, "w") as f:
-        json.dump(badges, f, indent=2)
+    write_json(BADGES_PATH, badges)
 
 def award_badge(badge):
     badges = load_badges()
@@ -71,11 +62,11 @@ def show_badges():
 
 
 def record_voice_note():
-    fs = 44100  
+    from ui.voice import get_audio_session
+    session = get_audio_session()
+    fs = session.fs
     try:
-        devices = sd.query_devices()
-        input_devices = [d for d in devices if d.get('max_input_channels', 0) > 0]
-        if not input_devices:
+        if session.input_device() is None:
             console.print("[yellow]No input device (microphone) found. Cannot record voice note.[/yellow]")
             return None
     except Exception as e:
@@ -88,32 +79,60 @@ def record_voice_note():
         seconds = 10
     console.print(f"[cyan]Recording for {seconds} seconds... Speak now![/cyan]")
     try:
-        recording = sd.rec(int(seconds * fs), samplerate=fs, channels=1, dtype='int16')
-        sd.wait()
+        recording = session.record(seconds)
     except Exception as e:
         console.print(f"[yellow]Audio recording failed: {e}[/yellow]")
         return None
-    tmpfile = tempfile.NamedTemporaryFile(delete=False, suffix='.wav')
-    write(tmpfile.name, fs, recording)
-    tmpfile.close()
-    return tmpfile.name
+    finally:
+        # Only the voice menu keeps the stream warm; don't hold the microphone after a one-off note
+        session.release()
+    return recording, fs
 
-def save_voice_note_to_log(log_path, wav_path):
-    if not os.path.exists(wav_path):
-        return None
-    dest = os.path.join(VOICE_DIR, os.path.basename(log_path).replace('.json', '.wav'))
-    shutil.move(wav_path, dest)
-    return dest
+def save_voice_note_to_log(log_path, voice_note):
+    """Store a (samples, sample rate) recording in the configured voice note format"""
+    from ui.voice_notes import save_voice_note
+    samples, fs = voice_note
+    return save_voice_note(log_path, samples, fs)
 
 def play_voice_note(log_path):
-    wav_path = os.path.join(VOICE_DIR, os.path.basename(log_path).replace('.json', '.wav'))
-    if not os.path.exists(wav_path):
+    from ui.voice_notes import find_voice_note, play_voice_note_file
+    note_path = find_voice_note(log_path)
+    if not note_path:
         console.print("[yellow]No voice note for this log.[/yellow]")
         return
-    fs, data = wavread(wav_path)
     console.print("[cyan]Playing voice note...[/cyan]")
-    sd.play(data, fs)
-    sd.wait()
+    play_voice_note_file(note_path)
+
+def build_entry(did, will_do, blockers, tags="", notes="", time_spent=0, mood=None):
+    """Assemble a standup entry; tags are comma separated"""
+    return {
+        "date": datetime.now().strftime("%Y-%m-%d %H:%M"),
+        "did": did,
+        "will_do": will_do,
+        "blockers": blockers,
+        "tags": [t.strip() for t in tags.split(",") if t.strip()],
+        "notes": notes,
+        "voice_note": None,
+        "time_spent": time_spent,
+        "pomodoro_count": 0,
+        "mood": mood
+    }
+
+def save_log_entry(entry, voice_note=None):
+    """Write today's entry, index it and award badges"""
+    path = get_today_path()
+    is_first_log = not os.path.exists(path)
+    if voice_note is not None:
+        entry["voice_note"] = save_voice_note_to_log(path, voice_note)
+    write_json(path, entry)
+    index_entry(os.path.basename(path), entry)
+    console.print("[bold green]Entry saved![/bold green]")
+    with batch():
+        if is_first_log:
+            award_badge("First Log")
+        streak = get_streaks()["current"]
+        if streak >= 3:
+            award_badge(f"{streak}-Day Streak")
 
 def log_entry():
     console.print(Panel("[bold cyan]StandLog CLI - Daily Standup[/bold cyan]", expand=False))
@@ -128,77 +147,32 @@ def log_entry():
     except Exception:
         time_spent = 0
     
-    from ui.mood import select_mood, log_mood, MOOD_EMOJIS
+    from ui.mood import select_mood
     console.print("\n[bold cyan]Mood Tracking[/bold cyan]")
     mood = select_mood()
     
     attach_voice = Prompt.ask("Record a voice note? (y/n)", choices=["y","n"], default="n")
-    voice_path = None
+    voice_note = None
     if attach_voice == "y":
-        wav_path = record_voice_note()
-        voice_path = wav_path
-    entry = {
-        "date": datetime.now().strftime("%Y-%m-%d %H:%M"),
-        "did": did,
-        "will_do": will_do,
-        "blockers": blockers,
-        "tags": [t.strip() for t in tags.split(",") if t.strip()],
-        "notes": notes,
-        "voice_note": None,
-        "time_spent": time_spent,
-        "pomodoro_count": 0,
-        "mood": mood
-    }
-    path = get_today_path()
-    is_first_log = not os.path.exists(path)
-    with open(path, "w") as f:
-        json.dump(entry, f, indent=2)
-    if voice_path:
-        dest = save_voice_note_to_log(path, voice_path)
-        entry["voice_note"] = dest
-        with open(path, "w") as f:
-            json.dump(entry, f, indent=2)
-    console.print("[bold green]Entry saved![/bold green]")
-    if is_first_log:
-        award_badge("First Log")
-    import re
-    files = sorted([f for f in os.listdir(DATA_DIR) if f.endswith('.json') and re.match(r'\d{4}-\d{2}-\d{2}\.json$', f)])
-    streak = 0
-    prev = None
-    for fname in files:
-        date = fname.replace('.json', '')
-        try:
-            d_obj = datetime.strptime(date, "%Y-%m-%d")
-        except Exception:
-            continue
-        if prev and (d_obj - prev).days == 1:
-            streak += 1
-        else:
-            streak = 1
-        prev = d_obj
-    if streak >= 3:
-        award_badge(f"{streak}-Day Streak")
+        voice_note = record_voice_note()
+    save_log_entry(build_entry(did, will_do, blockers, tags, notes, time_spent, mood), voice_note)
 
 
-def view_entry():
-    path = get_today_path()
+def view_entry(date=None, interactive=True):
+    path = os.path.join(DATA_DIR, f"{date}.json") if date else get_today_path()
     if not os.path.exists(path):
-        console.print("[red]No entry for today yet.[/red]")
+        console.print(f"[red]No entry for {date}.[/red]" if date else "[red]No entry for today yet.[/red]")
         return
-    with open(path) as f:
-        entry = json.load(f)
-    pomodoro_info = f"\n[b]Pomodoros completed:[/b] {entry.get('pomodoro_count', 0)}" if entry.get('pomodoro_count', 0) > 0 else ""
-    mood_info = ""
-    if entry.get('mood'):
-        from ui.mood import MOOD_EMOJIS, MOOD_COLORS
-        mood = entry.get('mood')
-        mood_text = MOOD_EMOJIS.get(mood, "Unknown")
-        mood_color = MOOD_COLORS.get(mood, "white")
-        mood_info = f"\n[b]Mood:[/b] [{mood_color}]{mood_text}[/{mood_color}]"
-    
-    panel = Panel(f"[b]What I did:[/b] {entry['did']}\n[b]What I'll do:[/b] {entry['will_do']}\n[b]Blockers:[/b] {entry['blockers']}\n[b]Tags:[/b] {', '.join(entry['tags']) if entry['tags'] else '-'}\n[b]Notes:[/b] {entry.get('notes','-')}\n[b]Time spent:[/b] {entry.get('time_spent', 0)} min{pomodoro_info}{mood_info}\n[b]Date:[/b] {entry['date']}", title="Today's Log", expand=False)
+    entry = load_entry(os.path.basename(path))
+    if entry is None:
+        return
+    from ui.render import render_file
+    panel = Panel(render_file(os.path.basename(path), "rich", entry), title=f"Log: {date}" if date else "Today's Log", expand=False)
     console.print(panel)
-    if entry.get("voice_note") or os.path.exists(os.path.join(VOICE_DIR, os.path.basename(path).replace('.json', '.wav'))):
+    if not interactive:
+        return
+    from ui.voice_notes import find_voice_note
+    if find_voice_note(path, entry):
         play = Prompt.ask("Play attached voice note? (y/n)", choices=["y","n"], default="n")
         if play == "y":
             play_voice_note(path)
@@ -212,8 +186,7 @@ def set_weekly_goals():
             if goals:
                 break
         goals.append({"goal": line, "done": False})
-    with open(GOALS_PATH, "w") as f:
-        json.dump(goals, f, indent=2)
+    write_json(GOALS_PATH, goals)
     console.print("[green]Goals saved![/green]")
 
 def mark_goal_progress():
@@ -236,8 +209,7 @@ def mark_goal_progress():
                 goals[int(i)-1]["done"] = True
             except Exception:
                 pass
-        with open(GOALS_PATH, "w") as f:
-            json.dump(goals, f, indent=2)
+        write_json(GOALS_PATH, goals)
         console.print("[green]Progress updated![/green]")
 
 def show_goal_progress():
@@ -291,101 +263,86 @@ def print_ascii_art():
     )
     console.print(group)
 
-def search_logs():
-    files = sorted([f for f in os.listdir(DATA_DIR) if f.endswith('.json')])
-    if not files:
+def search_logs(query=None):
+    rows = get_indexed_entries()
+    if not rows:
         console.print("[red]No logs to search.[/red]")
         return
     console.print(Panel("[bold cyan]Search Logs[/bold cyan]", expand=False))
-    mode = Prompt.ask("Search by", choices=["keyword", "tag", "date"], default="keyword")
-    results = []
+    mode = "keyword" if query else Prompt.ask("Search by", choices=["keyword", "tag", "date"], default="keyword")
+    matches = []
     if mode == "keyword":
-        kw = Prompt.ask("Enter keyword").lower()
-        for fname in files:
-            with open(os.path.join(DATA_DIR, fname)) as f:
-                entry = json.load(f)
-            if not isinstance(entry, dict):
-                continue
-            if (kw in entry.get("did", "").lower() or
-                kw in entry.get("will_do", "").lower() or
-                kw in entry.get("blockers", "").lower() or
-                kw in entry.get("notes", "").lower()):
-                results.append((fname, entry))
+        if not query:
+            query = Prompt.ask('Enter keywords ("quoted phrase", prefix*)')
+        matches = [fname for fname, _ in search(query)]
+        from ui.viewer import get_fernet
+        if not matches and "*" in query and get_fernet():
+            console.print("[yellow]Prefix search is not available while encryption is on.[/yellow]")
     elif mode == "tag":
         tag = Prompt.ask("Enter tag").lower()
-        for fname in files:
-            with open(os.path.join(DATA_DIR, fname)) as f:
-                entry = json.load(f)
-            if not isinstance(entry, dict):
-                continue
-            tags = [t.lower() for t in entry.get("tags", [])]
-            if tag in tags:
-                results.append((fname, entry))
+        matches = [row["filename"] for row in rows if tag in [t.lower() for t in row["tags"]]]
     elif mode == "date":
-        start = Prompt.ask("Start date (YYYY-MM-DD)", default=files[0].replace('.json',''))
-        end = Prompt.ask("End date (YYYY-MM-DD)", default=files[-1].replace('.json',''))
-        for fname in files:
-            date = fname.replace('.json','')
-            with open(os.path.join(DATA_DIR, fname)) as f:
-                entry = json.load(f)
-            if not isinstance(entry, dict):
-                continue
-            if start <= date <= end:
-                results.append((fname, entry))
+        start = Prompt.ask("Start date (YYYY-MM-DD)", default=rows[0]["date"])
+        end = Prompt.ask("End date (YYYY-MM-DD)", default=rows[-1]["date"])
+        matches = [row["filename"] for row in rows if start <= row["date"] <= end]
+    from ui.render import render_entries
+    results = list(render_entries(matches, "rich"))
     if not results:
         console.print("[yellow]No matching logs found.[/yellow]")
         return
-    for fname, entry in results:
-        mood_info = ""
-        if entry.get('mood'):
-            from ui.mood import MOOD_EMOJIS, MOOD_COLORS
-            mood = entry.get('mood')
-            mood_text = MOOD_EMOJIS.get(mood, "Unknown")
-            mood_color = MOOD_COLORS.get(mood, "white")
-            mood_info = f"\n[b]Mood:[/b] [{mood_color}]{mood_text}[/{mood_color}]"
-        panel = Panel(f"[b]Date:[/b] {entry['date']}\n[b]What I did:[/b] {entry['did']}\n[b]What I'll do:[/b] {entry['will_do']}\n[b]Blockers:[/b] {entry['blockers']}\n[b]Tags:[/b] {', '.join(entry['tags']) if entry['tags'] else '-'}\n[b]Notes:[/b] {entry.get('notes','-')}{mood_info}", title=f"Log: {fname.replace('.json','')}", expand=False)
-        console.print(panel)
+    for fname, fragment in results:
+        console.print(Panel(fragment, title=f"Log: {fname.replace('.json','')}", expand=False))
 def setup_email():
     console.print(Panel("[bold yellow]Setup Email Export[/bold yellow]", expand=False))
     user = Prompt.ask("Enter your Gmail address")
     password = Prompt.ask("Enter your Gmail app password (see README)", password=True)
     to = Prompt.ask("Enter recipient email (yourself or team)", default=user)
     config = {"user": user, "password": password, "to": to}
-    with open(EMAIL_CONFIG_PATH, "w") as f:
-        json.dump(config, f, indent=2)
+    write_json(EMAIL_CONFIG_PATH, config)
     console.print("[green]Email config saved![/green]")
+def build_weekly_report():
+    """Markdown report of the past week's logs, or None if there are none"""
+    from ui.render import render_entries
+    from datetime import timedelta
+    since = (datetime.now().date() - timedelta(days=6)).strftime("%Y-%m-%d")
+    week_files = [row["filename"] for row in get_indexed_entries() if row["date"] >= since]
+    if not week_files:
+        return None
+    return "# StandLog Weekly Report\n\n" + "".join(fragment for _, fragment in render_entries(week_files, "email"))
 def email_weekly_logs():
+    """Queue this week's report in the outbox; it is sent in the background"""
     if not os.path.exists(EMAIL_CONFIG_PATH):
         console.print("[yellow]No email config found. Please run setup first.[/yellow]")
         setup_email()
-    with open(EMAIL_CONFIG_PATH) as f:
-        config = json.load(f)
-    files = sorted([f for f in os.listdir(DATA_DIR) if f.endswith('.json')])
-    if not files:
-        console.print("[red]No logs to email.[/red]")
+    config = read_json(EMAIL_CONFIG_PATH)
+    import importlib.util
+    if importlib.util.find_spec("yagmail") is None:
+        console.print("[red]Install the 'yagmail' package to email logs: pip install yagmail[/red]")
         return
-    from datetime import timedelta
-    today = datetime.now().date()
-    week_files = []
-    for fname in files:
-        try:
-            d = datetime.strptime(fname.replace('.json',''), "%Y-%m-%d").date()
-            if (today - d).days < 7:
-                week_files.append(fname)
-        except Exception:
-            continue
-    if not week_files:
+    body = build_weekly_report()
+    if body is None:
         console.print("[yellow]No logs from the past week.[/yellow]")
         return
-    week_files.sort()
-    body = "# StandLog Weekly Report\n\n"
-    for fname in week_files:
-        with open(os.path.join(DATA_DIR, fname)) as f:
-            entry = json.load(f)
-        body += f"## {fname.replace('.json', '')}\n- **Did:** {entry['did']}\n- **Will do:** {entry['will_do']}\n- **Blockers:** {entry['blockers']}\n- **Tags:** {', '.join(entry['tags']) if entry['tags'] else '-'}\n- **Notes:** {entry.get('notes','-')}\n\n"
-    yag = yagmail.SMTP(config['user'], config['password'])
-    yag.send(config['to'], "StandLog Weekly Report", body)
-    console.print(f"[green]Weekly logs emailed to {config['to']}![/green]")
+    from ui.outbox import enqueue_email
+    enqueue_email(config['to'], "StandLog Weekly Report", body)
+    console.print(f"[green]Weekly report queued for {config['to']}; it will be sent in the background.[/green]")
+def email_menu():
+    from ui.outbox import show_outbox, retry_failed
+    while True:
+        console.print("\n[bold cyan]Email[/bold cyan]")
+        console.print("[1] Email weekly logs\n[2] Outbox status\n[3] Retry failed emails\n[4] Email setup\n[5] Back")
+        choice = Prompt.ask("Choose an option", choices=["1", "2", "3", "4", "5"], default="1")
+        if choice == "1":
+            email_weekly_logs()
+        elif choice == "2":
+            show_outbox()
+        elif choice == "3":
+            console.print(f"[green]{retry_failed()} emails queued for another try.[/green]")
+        elif choice == "4":
+            setup_email()
+        else:
+            break
+
 def load_automation_rules():
     if not os.path.exists(AUTOMATION_RULES_PATH):
         return []
@@ -396,8 +353,7 @@ def load_automation_rules():
             return []
 
 def save_automation_rules(rules):
-    with open(AUTOMATION_RULES_PATH, "w") as f:
-        json.dump(rules, f, indent=2)
+    write_json(AUTOMATION_RULES_PATH, rules)
 
 def automation_rules_menu():
     while True:
@@ -453,99 +409,55 @@ def evaluate_automation_rules(context):
     return actions
 
 
+def load_goal_list():
+    try:
+        return read_json(GOALS_PATH, [])
+    except Exception:
+        return []
+
 def build_contextual_links():
     """
-    Scan all logs and goals, auto-link related logs (by tags/keywords/date),
-    link logs to goals if goal keywords appear in log, and feedback to logs.
-    Store links in each log file as a 'links' field.
+    Bring the knowledge graph up to date: related logs (shared tags), logs linked to
+    goals whose text they mention, and feedback. Links live in index.db and only
+    entries whose content changed are re-read; entry files are never rewritten.
     """
-    logs = {}
-    files = [f for f in os.listdir(DATA_DIR) if f.endswith('.json') and re.match(r'\d{4}-\d{2}-\d{2}\.json$', f)]
-    for fname in files:
-        with open(os.path.join(DATA_DIR, fname)) as f:
-            try:
-                logs[fname] = json.load(f)
-            except Exception:
-                continue
-    goals = []
-    if os.path.exists(GOALS_PATH):
-        with open(GOALS_PATH) as f:
-            try:
-                goals = json.load(f)
-            except Exception:
-                goals = []
-    tag_map = defaultdict(list)
-    for fname, entry in logs.items():
-        for tag in entry.get('tags', []):
-            tag_map[tag.lower()].append(fname)
-    for fname, entry in logs.items():
-        links = set()
-        for tag in entry.get('tags', []):
-            for other in tag_map[tag.lower()]:
-                if other != fname:
-                    links.add(other)
-        goal_links = []
-        for idx, goal in enumerate(goals):
-            goal_kw = goal['goal'].lower()
-            if (goal_kw in entry.get('did', '').lower() or
-                goal_kw in entry.get('will_do', '').lower() or
-                goal_kw in entry.get('notes', '').lower()):
-                goal_links.append(idx)
-        feedback_links = []
-        if 'feedback' in entry:
-            feedback_links.append(fname + ':feedback')
-        entry['links'] = {
-            'related_logs': sorted(list(links)),
-            'goals': goal_links,
-            'feedback': feedback_links
-        }
-        with open(os.path.join(DATA_DIR, fname), 'w') as f:
-            json.dump(entry, f, indent=2)
-
-def render_knowledge_graph():
+    from ui.graph import update_graph
+    update_graph(load_goal_list())
+
+def render_knowledge_graph(graph=None, focus=None, depth=1, page=0):
     """
-    Render a simple ASCII/text knowledge graph of logs, goals, and feedback links.
+    Render one page of the knowledge graph: every node, or the nodes within `depth`
+    hops of `focus` indented by distance. Returns the number of pages.
     """
-    logs = {}
-    files = [f for f in os.listdir(DATA_DIR) if f.endswith('.json') and re.match(r'\d{4}-\d{2}-\d{2}\.json$', f)]
-    for fname in files:
-        with open(os.path.join(DATA_DIR, fname)) as f:
-            try:
-                logs[fname] = json.load(f)
-            except Exception:
-                continue
-    goals = []
-    if os.path.exists(GOALS_PATH):
-        with open(GOALS_PATH) as f:
-            try:
-                goals = json.load(f)
-            except Exception:
-                goals = []
-    nodes = []
-    edges = []
-    for fname, entry in logs.items():
-        nodes.append(f"[log] {fname.replace('.json','')}")
-        for rel in entry.get('links', {}).get('related_logs', []):
-            edges.append((f"[log] {fname.replace('.json','')}", f"[log] {rel.replace('.json','')}", 'tag'))
-        for goal_idx in entry.get('links', {}).get('goals', []):
-            if goal_idx < len(goals):
-                edges.append((f"[log] {fname.replace('.json','')}", f"[goal] {goals[goal_idx]['goal']}", 'goal'))
-        for fb in entry.get('links', {}).get('feedback', []):
-            edges.append((f"[log] {fname.replace('.json','')}", f"[feedback] {fname.replace('.json','')}", 'feedback'))
-    for idx, goal in enumerate(goals):
-        nodes.append(f"[goal] {goal['goal']}")
-    console.print(Panel("[bold magenta]StandLog Knowledge Graph[/bold magenta]", expand=False))
-    for node in nodes:
-        console.print(f"[bold]{node}[/bold]")
-        for edge in edges:
-            if edge[0] == node:
-                if edge[2] == 'tag':
-                    console.print(f"   └─[cyan]related log[/cyan]→ {edge[1]}")
-                elif edge[2] == 'goal':
-                    console.print(f"   └─[green]linked goal[/green]→ {edge[1]}")
-                elif edge[2] == 'feedback':
-                    console.print(f"   └─[yellow]feedback[/yellow]→ {edge[1]}")
-
+    from ui.graph import LinkGraph, GRAPH_PAGE_SIZE, MAX_RELATED_SHOWN
+    from rich.markup import escape
+    graph = graph or LinkGraph(load_goal_list())
+    nodes = graph.neighborhood(focus, depth) if focus else [(node, 0) for node in graph.nodes()]
+    pages = max(1, -(-len(nodes) // GRAPH_PAGE_SIZE))
+    page = min(max(page, 0), pages - 1)
+    edge_styles = {'tag': "[cyan]related log[/cyan]", 'goal': "[green]linked goal[/green]", 'feedback': "[yellow]feedback[/yellow]"}
+    lines = []
+    for node, distance in nodes[page * GRAPH_PAGE_SIZE:(page + 1) * GRAPH_PAGE_SIZE]:
+        indent = "   " * distance
+        lines.append(f"{indent}[bold]{escape(graph.label(node))}[/bold]")
+        edges = graph.neighbors(node)
+        related = 0
+        for kind, other in edges:
+            if kind == 'tag':
+                related += 1
+                if related > MAX_RELATED_SHOWN:
+                    continue
+            lines.append(f"{indent}   └─{edge_styles[kind]}→ {escape(graph.label(other))}")
+        if related > MAX_RELATED_SHOWN:
+            lines.append(f"{indent}   └─[dim]... {related - MAX_RELATED_SHOWN} more related logs[/dim]")
+    title = "StandLog Knowledge Graph"
+    if focus:
+        title += f" - {escape(graph.label(focus))} (depth {depth})"
+    # One print for the whole page rather than one per line
+    console.print(Panel(f"[bold magenta]{title}[/bold magenta]", expand=False),
+                  "\n".join(lines) or "[yellow]No logs or goals to show yet.[/yellow]",
+                  f"[dim]Page {page + 1}/{pages} - {len(nodes)} nodes[/dim]", sep="\n")
+    return pages
 
 def print_ascii_art():
     from rich.text import Text
@@ -590,7 +502,7 @@ def main_menu():
     while True:
         reminder()
         console.print("\n[bold cyan]StandLog CLI[/bold cyan]", style="bold")
-        console.print("[1] Log today's standup\n[2] View today's log\n[3] Stats/Export/Reminder\n[4] Set weekly goals\n[5] Mark goal progress\n[6] Search logs\n[7] Email weekly logs\n[8] Knowledge Graph\n[9] Time Tracking Stats\n[10] Automation Rules\n[11] Pomodoro Timer\n[12] Mood Tracking\n[13] Customizable Dashboard\n[14] Quit")
+        console.print("[1] Log today's standup\n[2] View today's log\n[3] Stats/Export/Reminder\n[4] Set weekly goals\n[5] Mark goal progress\n[6] Search logs\n[7] Email\n[8] Knowledge Graph\n[9] Time Tracking Stats\n[10] Automation Rules\n[11] Pomodoro Timer\n[12] Mood Tracking\n[13] Customizable Dashboard\n[14] Quit")
         choice = Prompt.ask("Choose an option", choices=["1", "2", "3", "4", "5", "6", "7", "8", "9", "10", "11", "12", "13", "14"], default="1")
         if choice == "1":
             log_entry()
@@ -605,7 +517,7 @@ def main_menu():
         elif choice == "6":
             search_logs()
         elif choice == "7":
-            email_weekly_logs()
+            email_menu()
         elif choice == "8":
             knowledge_graph_menu()
         elif choice == "9":
@@ -613,6 +525,7 @@ def main_menu():
         elif choice == "10":
             automation_rules_menu()
         elif choice == "11":
+            from ui.pomodoro import pomodoro_menu
             pomodoro_menu()
         elif choice == "12":
             from ui.mood import mood_menu
@@ -621,62 +534,164 @@ def main_menu():
             from ui.dashboard import dashboard_menu
             dashboard_menu()
         elif choice == "14":
+            from ui.outbox import list_messages
+            pending = sum(1 for m in list_messages() if m["status"] == "queued")
+            if pending:
+                console.print(f"[yellow]{pending} email(s) still queued; they will be sent next time StandLog runs.[/yellow]")
             console.print("[bold yellow]Goodbye![/bold yellow]")
             break
 def knowledge_graph_menu():
+    from ui.graph import LinkGraph
     build_contextual_links()
-    render_knowledge_graph()
-    Prompt.ask("Press Enter to return to main menu")
-def time_tracking_stats():
+    graph = LinkGraph(load_goal_list())
+    focus, depth, page = None, 1, 0
+    while True:
+        pages = render_knowledge_graph(graph, focus, depth, page)
+        choice = Prompt.ask("[n]ext, [p]rev, [f]ocus on a log or goal, [d]epth, [a]ll nodes, [q]uit",
+                            choices=["n", "p", "f", "d", "a", "q"], default="n" if page + 1 < pages else "q")
+        if choice == "n":
+            page = min(page + 1, pages - 1)
+        elif choice == "p":
+            page = max(page - 1, 0)
+        elif choice == "f":
+            node = graph.find(Prompt.ask("Date (YYYY-MM-DD), goal number or goal text"))
+            if node is None:
+                console.print("[yellow]No matching log or goal.[/yellow]")
+            else:
+                focus, page = node, 0
+        elif choice == "d":
+            try:
+                depth = max(1, int(Prompt.ask("Neighborhood depth", default=str(depth))))
+            except ValueError:
+                console.print("[yellow]Depth must be a number.[/yellow]")
+            page = 0
+        elif choice == "a":
+            focus, page = None, 0
+        else:
+            break
+def time_tracking_stats(pause=True):
     """
     Show time spent per day/week and a simple bar chart in the terminal.
     Also includes Pomodoro statistics.
     """
-    files = sorted([f for f in os.listdir(DATA_DIR) if f.endswith('.json') and re.match(r'\d{4}-\d{2}-\d{2}\.json$', f)])
-    if not files:
+    from ui.metrics import load_metrics, date_labels, rolling_mean
+    import numpy as np
+    metrics = load_metrics()
+    logged = np.flatnonzero(metrics["present"]) if metrics else []
+    if not len(logged):
         console.print("[yellow]No logs to show time tracking stats.[/yellow]")
         return
-    day_times = []
-    day_pomodoros = []
-    for fname in files:
-        with open(os.path.join(DATA_DIR, fname)) as f:
-            try:
-                entry = json.load(f)
-            except Exception:
-                continue
-        t = entry.get('time_spent', 0)
-        try:
-            t = int(t)
-        except Exception:
-            t = 0
-        day_times.append((fname.replace('.json',''), t))
-        p = entry.get('pomodoro_count', 0)
-        try:
-            p = int(p)
-        except Exception:
-            p = 0
-        day_pomodoros.append((fname.replace('.json',''), p))
+    times = metrics["time_spent"][logged]
+    pomodoros = metrics["pomodoro_count"][logged]
+    recent = logged[-7:]
     console.print(Panel("[bold blue]Time Tracking Stats[/bold blue]", expand=False))
-    total = sum(t for _, t in day_times)
+    total = int(times.sum())
     console.print(f"[bold]Total time logged:[/bold] {total} min ({total//60}h {total%60}m)")
-    for day, t in day_times[-7:]:
+    for day, t in zip(date_labels(metrics, recent), metrics["time_spent"][recent].tolist()):
         bar = "[green]" + "█"*(t//10) + "[/green]" if t else ""
         console.print(f"[bold]{day}[/bold]: {t} min {bar}")
-    total_pomodoros = sum(p for _, p in day_pomodoros)
+    weekly = rolling_mean(metrics["time_spent"], 7)
+    if len(weekly):
+        console.print(f"[bold]7-day rolling average:[/bold] {weekly[-1]:.0f} min/day")
+    total_pomodoros = int(pomodoros.sum())
     if total_pomodoros > 0:
         console.print("\n[bold magenta]Pomodoro Stats[/bold magenta]")
         console.print(f"[bold]Total Pomodoros completed:[/bold] {total_pomodoros}")
-        for day, p in day_pomodoros[-7:]:
+        for day, p in zip(date_labels(metrics, recent), metrics["pomodoro_count"][recent].tolist()):
             if p > 0:
                 bar = "[magenta]" + "●"*p + "[/magenta]"
                 console.print(f"[bold]{day}[/bold]: {p} pomodoros {bar}")
-        avg_pomodoros_per_day = total_pomodoros / len(files)
+        avg_pomodoros_per_day = total_pomodoros / len(logged)
         console.print(f"[bold]Average Pomodoros per day:[/bold] {avg_pomodoros_per_day:.1f}")
         focus_time = total_pomodoros * 25
         console.print(f"[bold]Estimated focus time:[/bold] {focus_time} min ({focus_time//60}h {focus_time%60}m)")
-    Prompt.ask("Press Enter to return to main menu")
-def main():
+    if pause:
+        Prompt.ask("Press Enter to return to main menu")
+def parse_date_arg(value):
+    """argparse type for YYYY-MM-DD dates; anything else is a usage error"""
+    import argparse
+    try:
+        if datetime.strptime(value, "%Y-%m-%d").strftime("%Y-%m-%d") == value:
+            return value
+    except ValueError:
+        pass
+    raise argparse.ArgumentTypeError(f"invalid date {value!r}, expected YYYY-MM-DD")
+
+def build_parser():
+    """Subcommands for scripts, hooks and editors; they skip the splash screen and reminder"""
+    import argparse
+    parser = argparse.ArgumentParser(prog="standlog", description="StandLog - terminal developer journal. Run without arguments for the interactive menu.")
+    commands = parser.add_subparsers(dest="command", metavar="command")
+
+    log = commands.add_parser("log", help="log today's standup without prompts")
+    log.add_argument("--did", required=True, help="what you worked on")
+    log.add_argument("--will-do", default="", help="what you will work on next")
+    log.add_argument("--blockers", default="", help="any blockers")
+    log.add_argument("--tags", default="", help="comma separated tags")
+    log.add_argument("--notes", default="", help="additional notes")
+    log.add_argument("--time", type=int, default=0, dest="time_spent", help="minutes spent today")
+    log.add_argument("--mood", choices=["1", "2", "3", "4", "5"], help="mood from 1 (bad) to 5 (great)")
+
+    view = commands.add_parser("view", help="print a log (today's by default)")
+    view.add_argument("date", nargs="?", type=parse_date_arg, help="date as YYYY-MM-DD")
+
+    search_cmd = commands.add_parser("search", help="keyword search across logs")
+    search_cmd.add_argument("query", nargs="+", help='keywords, "quoted phrases" or prefix*')
+
+    stats = commands.add_parser("stats", help="weekly stats")
+    stats.add_argument("--time", action="store_true", help="show time tracking and Pomodoro stats instead")
+
+    export = commands.add_parser("export", help="export every log to ~/.standlog/journal.<format>")
+    export.add_argument("--format", choices=["md", "json", "jsonl"], default="md")
+
+    pomodoro = commands.add_parser("pomodoro", help="Pomodoro timer")
+    pomodoro_commands = pomodoro.add_subparsers(dest="action", metavar="action", required=True)
+    start = pomodoro_commands.add_parser("start", help="run one work session in the foreground")
+    start.add_argument("--minutes", type=int, default=25)
+    start.add_argument("--task", default="", help="what you are working on")
+
+    mood = commands.add_parser("mood", help="mood tracking")
+    mood_commands = mood.add_subparsers(dest="action", metavar="action", required=True)
+    mood_log = mood_commands.add_parser("log", help="record a mood")
+    mood_log.add_argument("mood", choices=["1", "2", "3", "4", "5"], help="1 (bad) to 5 (great)")
+    mood_log.add_argument("--date", type=parse_date_arg, help="date as YYYY-MM-DD (default: today)")
+    return parser
+
+def run_command(args):
+    if args.command == "log":
+        save_log_entry(build_entry(args.did, args.will_do, args.blockers, args.tags, args.notes, args.time_spent, args.mood))
+    elif args.command == "view":
+        view_entry(args.date, interactive=False)
+    elif args.command == "search":
+        search_logs(" ".join(args.query))
+    elif args.command == "stats":
+        if args.time:
+            time_tracking_stats(pause=False)
+        else:
+            from ui.viewer import show_weekly_stats
+            show_weekly_stats()
+    elif args.command == "export":
+        from ui.viewer import export_logs
+        export_logs(args.format)
+    elif args.command == "pomodoro":
+        from ui.pomodoro import run_timer
+        try:
+            run_timer(args.minutes, "Work Session", args.task)
+        except KeyboardInterrupt:
+            console.print("\n[yellow]Pomodoro interrupted![/yellow]")
+    elif args.command == "mood":
+        from ui.mood import log_mood
+        log_mood(args.mood, args.date)
+
+def main(argv=None):
+    import sys
+    argv = sys.argv[1:] if argv is None else argv
     ensure_data_dir()
-    main_menu()
+    if not argv:
+        from ui.outbox import resume_outbox
+        resume_outbox()
+        main_menu()
+        return
+    run_command(build_parser().parse_args(argv))
 if __name__ == "__main__":
     main()
@@ -0,0 +1,42 @@
+import pytest
+
+from ui.voice import CommandGrammar, DEFAULT_VOICE_COMMANDS_CONFIG
+
+
+THRESHOLD = DEFAULT_VOICE_COMMANDS_CONFIG["confidence_threshold"]
+
+
+@pytest.mark.parametrize("text, command", [
+    ("log today's standup", "log_entry"),
+    ("show my log from today", "view_entry"),
+    ("set my mood to happy", "log_mood"),
+    ("please start a pomodoro", "start_pomodoro"),
+])
+def test_builtin_phrases_clear_the_threshold(text, command):
+    matched, _, confidence = CommandGrammar().match(text)
+    assert matched == command
+    assert confidence >= THRESHOLD
+
+
+def test_arguments_are_extracted():
+    assert CommandGrammar().match("mark goal 3 as done")[:2] == ("mark_goal", ("3",))
+    assert CommandGrammar().match("what did i do last friday")[:2] == ("query_past", ("friday",))
+
+
+def test_unknown_text_does_not_match():
+    assert CommandGrammar().match("banana bread") == (None, None, 0.0)
+
+
+def test_custom_phrases_are_indexed_by_their_first_word():
+    grammar = CommandGrammar([{"phrase": "Wrap up the day", "command": "view_entry"}])
+    assert grammar.anywhere == []
+    assert grammar.match("hey wrap up the day")[0] == "view_entry"
+
+
+def test_custom_patterns_with_top_level_alternation_try_every_branch():
+    grammar = CommandGrammar([{"pattern": r"hi there|hello", "command": "view_entry"},
+                              {"pattern": r"wrap (?:up|it) now", "command": "view_entry"}])
+    assert len(grammar.anywhere) == 1
+    assert grammar.match("hello")[0] == "view_entry"
+    assert grammar.match("hi there")[0] == "view_entry"
+    assert grammar.match("wrap it now")[0] == "view_entry"
@@ -6,12 +6,13 @@ from rich.layout import Layout
 from rich.align import Align
 from rich.text import Text
 from rich import box
-from datetime import datetime, timedelta
+from datetime import datetime
 import os
 import json
-import re
 from collections import defaultdict, Counter
 import random
+import time
+from ui.storage import write_json
 
 console = Console()
 DATA_DIR = os.path.expanduser("~/.standlog/entries")
@@ -100,8 +101,7 @@ def load_dashboard_config():
     """Load dashboard configuration or create default if not exists"""
     if not os.path.exists(DASHBOARD_CONFIG_PATH):
         os.makedirs(os.path.dirname(DASHBOARD_CONFIG_PATH), exist_ok=True)
-        with open(DASHBOARD_CONFIG_PATH, "w") as f:
-            json.dump(DEFAULT_DASHBOARD_CONFIG, f, indent=2)
+        write_json(DASHBOARD_CONFIG_PATH, DEFAULT_DASHBOARD_CONFIG)
         return DEFAULT_DASHBOARD_CONFIG
     
     try:
@@ -116,8 +116,7 @@ def load_dashboard_config():
 def save_dashboard_config(config):
     """Save dashboard configuration"""
     try:
-        with open(DASHBOARD_CONFIG_PATH, "w") as f:
-            json.dump(config, f, indent=2)
+        write_json(DASHBOARD_CONFIG_PATH, config)
         return True
     except Exception as e:
         console.print(f"[red]Error saving dashboard config: {e}[/red]")
@@ -128,8 +127,7 @@ def load_themes():
     """Load themes or create default if not exists"""
     if not os.path.exists(THEMES_PATH):
         os.makedirs(os.path.dirname(THEMES_PATH), exist_ok=True)
-        with open(THEMES_PATH, "w") as f:
-            json.dump(DEFAULT_THEMES, f, indent=2)
+        write_json(THEMES_PATH, DEFAULT_THEMES)
         return DEFAULT_THEMES
     
     try:
@@ -144,8 +142,7 @@ def load_themes():
 def save_themes(themes):
     """Save themes"""
     try:
-        with open(THEMES_PATH, "w") as f:
-            json.dump(themes, f, indent=2)
+        write_json(THEMES_PATH, themes)
         return True
     except Exception as e:
         console.print(f"[red]Error saving themes: {e}[/red]")
@@ -164,19 +161,9 @@ def load_entry(filename):
 
 
 def get_all_entries():
-    """Get all log entries"""
-    entries = {}
-    if not os.path.exists(DATA_DIR):
-        return entries
-    
-    files = [f for f in os.listdir(DATA_DIR) if f.endswith('.json') and re.match(r'\d{4}-\d{2}-\d{2}\.json$', f)]
-    for fname in files:
-        entry = load_entry(fname)
-        if entry:
-            date = fname.replace('.json', '')
-            entries[date] = entry
-    
-    return entries
+    """Get the indexed summary of all log entries, keyed by date"""
+    from ui.index import get_indexed_entries
+    return {row["date"]: row for row in get_indexed_entries()}
 
 
 def load_goals():
@@ -194,59 +181,27 @@ def load_goals():
 
 
 def get_current_streak():
-    """Calculate current logging streak"""
-    entries = get_all_entries()
-    if not entries:
-        return 0
-    
-    dates = sorted(entries.keys())
-    today = datetime.now().strftime("%Y-%m-%d")
-    yesterday = (datetime.now() - timedelta(days=1)).strftime("%Y-%m-%d")
-    
-    if today not in dates and yesterday not in dates:
-        return 0
-    
-    streak = 1
-    for i in range(len(dates) - 1, 0, -1):
-        date1 = datetime.strptime(dates[i], "%Y-%m-%d")
-        date2 = datetime.strptime(dates[i-1], "%Y-%m-%d")
-        if (date1 - date2).days == 1:
-            streak += 1
-        else:
-            break
-    
-    return streak
+    """Get current logging streak"""
+    from ui.streaks import get_current_streak as current_streak
+    return current_streak()
 
 
-def get_mood_summary():
+def get_mood_summary(recent_moods=None):
     """Get mood summary for the last 7 days"""
     try:
-        from ui.mood import load_mood_data, MOOD_EMOJIS, MOOD_COLORS
-        has_mood_module = True
+        from ui.mood import get_recent_moods
     except ImportError:
-        has_mood_module = False
         return None
     
-    if not has_mood_module:
-        return None
-    
-    mood_data = load_mood_data()
-    if not mood_data:
-        return None
-    
-    dates = sorted(mood_data.keys())[-7:]
-    moods = []
-    for date in dates:
-        mood = mood_data[date].get("mood")
-        if mood and mood.isdigit():
-            moods.append((date, int(mood)))
-    
-    return moods
+    if recent_moods is None:
+        recent_moods = get_recent_moods(7)
+    return [(date, int(mood)) for date, mood in recent_moods if mood and mood.isdigit()]
 
 
-def get_pomodoro_stats():
+def get_pomodoro_stats(entries=None):
     """Get pomodoro statistics"""
-    entries = get_all_entries()
+    if entries is None:
+        entries = get_all_entries()
     if not entries:
         return None
     
@@ -264,9 +219,10 @@ def get_pomodoro_stats():
     return pomodoros
 
 
-def get_time_tracking_stats():
+def get_time_tracking_stats(entries=None):
     """Get time tracking statistics"""
-    entries = get_all_entries()
+    if entries is None:
+        entries = get_all_entries()
     if not entries:
         return None
     
@@ -284,9 +240,10 @@ def get_time_tracking_stats():
     return times
 
 
-def update_kpi_values(config):
+def update_kpi_values(config, entries=None):
     """Update KPI values based on log data"""
-    entries = get_all_entries()
+    if entries is None:
+        entries = get_all_entries()
     if not entries or "custom_kpis" not in config:
         return config
     
@@ -303,9 +260,34 @@ def update_kpi_values(config):
     return config
 
 
-def render_widget(widget_name, theme, box_width=40):
+def load_dashboard_data():
+    """Load everything the widgets read, once per dashboard render"""
+    try:
+        from ui.mood import get_recent_moods
+        mood_data = get_recent_moods(7)
+    except ImportError:
+        mood_data = None
+    config = load_dashboard_config()
+    goals = load_goals()
+    entries = get_all_entries()
+    # Recent Logs shows the last three entries' text, which the index omits while encrypted
+    from ui.viewer import fill_entry_text
+    fill_entry_text([entries[date] for date in sorted(entries)[-3:]])
+    return {
+        "config": config,
+        "themes": load_themes(),
+        "entries": entries,
+        "goals": goals,
+        "mood": mood_data,
+        "timings": {}
+    }
+
+
+def render_widget(widget_name, theme, box_width=40, data=None):
     """Render a single widget based on its type"""
-    themes = load_themes()
+    if data is None:
+        data = load_dashboard_data()
+    themes = data["themes"]
     theme_config = themes.get(theme, themes["default"])
     primary_color = theme_config["primary_color"]
     secondary_color = theme_config["secondary_color"]
@@ -314,7 +296,7 @@ def render_widget(widget_name, theme, box_width=40):
     box_style = getattr(box, theme_config["box_style"])
     
     if widget_name == "goal_progress":
-        goals = load_goals()
+        goals = data["goals"]
         if not goals:
             return Panel("[italic]No goals set for this week[/italic]", 
                          title=f"[{primary_color}]Weekly Goal Progress[/{primary_color}]",
@@ -330,7 +312,7 @@ def render_widget(widget_name, theme, box_width=40):
                      box=box_style, width=box_width)
     
     elif widget_name == "recent_logs":
-        entries = get_all_entries()
+        entries = data["entries"]
         if not entries:
             return Panel("[italic]No logs found[/italic]", 
                          title=f"[{primary_color}]Recent Logs[/{primary_color}]",
@@ -341,14 +323,14 @@ def render_widget(widget_name, theme, box_width=40):
         for date in dates:
             entry = entries[date]
             log_text += f"[{secondary_color}]{date}[/{secondary_color}]\n"
-            log_text += f"[{accent_color}]Did:[/{accent_color}] {entry['did'][:40]}...\n"
+            log_text += f"[{accent_color}]Did:[/{accent_color}] {entry['did_preview'][:40]}...\n"
         
         return Panel(log_text, 
                      title=f"[{primary_color}]Recent Logs[/{primary_color}]",
                      box=box_style, width=box_width)
     
     elif widget_name == "time_tracking":
-        times = get_time_tracking_stats()
+        times = get_time_tracking_stats(data["entries"])
         if not times:
             return Panel("[italic]No time tracking data[/italic]", 
                          title=f"[{primary_color}]Time Tracking Stats[/{primary_color}]",
@@ -357,16 +339,16 @@ def render_widget(widget_name, theme, box_width=40):
         time_text = ""
         total_time = sum(t for _, t in times)
         time_text += f"[{secondary_color}]Total time:[/{secondary_color}] {total_time} min\n"
-        for date, time in times[-3:]:  
-            bar = "[" + accent_color + "]" + "█"*(time//10) + "[/" + accent_color + "]" if time else ""
-            time_text += f"{date}: {time} min {bar}\n"
+        for date, spent in times[-3:]:  
+            bar = "[" + accent_color + "]" + "█"*(spent//10) + "[/" + accent_color + "]" if spent else ""
+            time_text += f"{date}: {spent} min {bar}\n"
         
         return Panel(time_text, 
                      title=f"[{primary_color}]Time Tracking Stats[/{primary_color}]",
                      box=box_style, width=box_width)
     
     elif widget_name == "mood_summary":
-        moods = get_mood_summary()
+        moods = get_mood_summary(data["mood"]) if data["mood"] is not None else None
         if not moods:
             return Panel("[italic]No mood data available[/italic]", 
                          title=f"[{primary_color}]Mood Summary[/{primary_color}]",
@@ -392,7 +374,7 @@ def render_widget(widget_name, theme, box_width=40):
                          box=box_style, width=box_width)
     
     elif widget_name == "pomodoro_stats":
-        pomodoros = get_pomodoro_stats()
+        pomodoros = get_pomodoro_stats(data["entries"])
         if not pomodoros:
             return Panel("[italic]No pomodoro data available[/italic]", 
                          title=f"[{primary_color}]Pomodoro Statistics[/{primary_color}]",
@@ -413,7 +395,7 @@ def render_widget(widget_name, theme, box_width=40):
                      box=box_style, width=box_width)
     
     elif widget_name == "tag_cloud":
-        entries = get_all_entries()
+        entries = data["entries"]
         if not entries:
             return Panel("[italic]No tags available[/italic]", 
                          title=f"[{primary_color}]Tag Cloud[/{primary_color}]",
@@ -456,8 +438,7 @@ def render_widget(widget_name, theme, box_width=40):
                      box=box_style, width=box_width)
     
     elif widget_name == "custom_kpi":
-        config = load_dashboard_config()
-        config = update_kpi_values(config)
+        config = update_kpi_values(data["config"], data["entries"])
         
         if "custom_kpis" not in config or not config["custom_kpis"]:
             return Panel("[italic]No custom KPIs defined[/italic]", 
@@ -491,8 +472,7 @@ def render_widget(widget_name, theme, box_width=40):
                      box=box_style, width=box_width)
     
     elif widget_name == "custom_ascii":
-        config = load_dashboard_config()
-        custom_ascii = config.get("custom_ascii")
+        custom_ascii = data["config"].get("custom_ascii")
         
         if custom_ascii:
             return Panel(custom_ascii, 
@@ -518,8 +498,11 @@ def render_widget(widget_name, theme, box_width=40):
 
 def render_dashboard():
     """Render the customizable dashboard"""
-    config = load_dashboard_config()
-    themes = load_themes()
+    start = time.perf_counter()
+    data = load_dashboard_data()
+    data["timings"]["data"] = time.perf_counter() - start
+    config = data["config"]
+    themes = data["themes"]
     theme = config.get("theme", "default")
     theme_config = themes.get(theme, themes["default"])
     primary_color = theme_config["primary_color"]
@@ -548,6 +531,12 @@ def render_dashboard():
     
     layout_type = config.get("layout", "2x2")
     active_widgets = config.get("active_widgets", [])
+
+    def widget(widget_name, box_width):
+        widget_start = time.perf_counter()
+        panel = render_widget(widget_name, theme, box_width=box_width, data=data)
+        data["timings"][widget_name] = time.perf_counter() - widget_start
+        return panel
     
     if layout_type == "1x4": 
         layout = Layout()
@@ -558,21 +547,14 @@ def render_dashboard():
             Layout(name="right")
         )
         
-        for i, widget_name in enumerate(active_widgets[:4]):
-            if i == 0:
-                layout["left"].update(render_widget(widget_name, theme, box_width=30))
-            elif i == 1:
-                layout["middle_left"].update(render_widget(widget_name, theme, box_width=30))
-            elif i == 2:
-                layout["middle_right"].update(render_widget(widget_name, theme, box_width=30))
-            elif i == 3:
-                layout["right"].update(render_widget(widget_name, theme, box_width=30))
+        for slot, widget_name in zip(["left", "middle_left", "middle_right", "right"], active_widgets[:4]):
+            layout[slot].update(widget(widget_name, 30))
         
         console.print(layout)
     
     elif layout_type == "4x1":  
         for widget_name in active_widgets[:4]:
-            console.print(render_widget(widget_name, theme, box_width=100))
+            console.print(widget(widget_name, 100))
     
     elif layout_type == "custom":  
         layout = Layout()
@@ -584,13 +566,8 @@ def render_dashboard():
             Layout(name="bottom_left"),
             Layout(name="bottom_right")
         )
-        for i, widget_name in enumerate(active_widgets[:3]):
-            if i == 0:
-                layout["top"].update(render_widget(widget_name, theme, box_width=100))
-            elif i == 1:
-                layout["bottom_left"].update(render_widget(widget_name, theme, box_width=48))
-            elif i == 2:
-                layout["bottom_right"].update(render_widget(widget_name, theme, box_width=48))
+        for (slot, width), widget_name in zip([("top", 100), ("bottom_left", 48), ("bottom_right", 48)], active_widgets[:3]):
+            layout[slot].update(widget(widget_name, width))
         
         console.print(layout)
     
@@ -609,18 +586,14 @@ def render_dashboard():
             Layout(name="bottom_right")
         )
         
-        for i, widget_name in enumerate(active_widgets[:4]):
-            if i == 0:
-                layout["top_left"].update(render_widget(widget_name, theme, box_width=48))
-            elif i == 1:
-                layout["top_right"].update(render_widget(widget_name, theme, box_width=48))
-            elif i == 2:
-                layout["bottom_left"].update(render_widget(widget_name, theme, box_width=48))
-            elif i == 3:
-                layout["bottom_right"].update(render_widget(widget_name, theme, box_width=48))
+        for slot, widget_name in zip(["top_left", "top_right", "bottom_left", "bottom_right"], active_widgets[:4]):
+            layout[slot].update(widget(widget_name, 48))
         
         console.print(layout)
 
+    timings = " · ".join(f"{name} {seconds * 1000:.1f}ms" for name, seconds in data["timings"].items())
+    console.print(f"[dim]Render timings: {timings} · total {(time.perf_counter() - start) * 1000:.1f}ms[/dim]")
+
 
 def configure_widgets():
     """Configure which widgets to display on the dashboard"""
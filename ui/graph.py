@@ -0,0 +1,323 @@
+import os
+import json
+import hashlib
+from collections import defaultdict, deque
+from contextlib import closing
+
+# Knowledge-graph links derived from entries. Related logs are not stored pairwise:
+# two logs are related when they share a row in graph_tags, so a popular tag costs one
+# row per log instead of one per pair.
+GRAPH_SCHEMA = """
+CREATE TABLE IF NOT EXISTS graph_nodes (
+    filename TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    content_hash TEXT NOT NULL,
+    goals_hash TEXT NOT NULL,
+    goals TEXT NOT NULL,
+    has_feedback INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS graph_tags (
+    tag TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    PRIMARY KEY (tag, filename)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS graph_tags_filename ON graph_tags(filename);
+CREATE TABLE IF NOT EXISTS goal_matches (
+    content_hash TEXT NOT NULL,
+    goals_hash TEXT NOT NULL,
+    goals TEXT NOT NULL,
+    PRIMARY KEY (content_hash, goals_hash)
+);
+"""
+GRAPH_PAGE_SIZE = 20
+# Related logs listed under a node before the rest are summarised as a count
+MAX_RELATED_SHOWN = 8
+GOAL_TEXT_FIELDS = ('did', 'will_do', 'notes')
+# goal_matches keeps results for this many recent goal lists, so switching back is free
+GOAL_MATCH_GENERATIONS = 4
+
+
+def goals_hash(goals):
+    return hashlib.sha1(json.dumps([g.get('goal', '') for g in goals]).encode()).hexdigest()
+
+
+class GoalMatcher:
+    """Aho-Corasick automaton over the lowercased goal texts.
+
+    Finds every goal that occurs in an entry in one pass over its text, however
+    many goals there are.
+    """
+
+    def __init__(self, goals):
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [[]]
+        self.always = []
+        for idx, goal in enumerate(goals):
+            pattern = goal.get('goal', '').lower()
+            if not pattern:
+                # An empty goal is "in" every text, as with the `in` operator
+                self.always.append(idx)
+                continue
+            state = 0
+            for ch in pattern:
+                if ch not in self.goto[state]:
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append([])
+                    self.goto[state][ch] = len(self.goto) - 1
+                state = self.goto[state][ch]
+            self.output[state].append(idx)
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, child in self.goto[state].items():
+                queue.append(child)
+                fallback = self.fail[state]
+                while fallback and ch not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.goto[fallback].get(ch, 0) if state else 0
+                self.output[child] = self.output[child] + self.output[self.fail[child]]
+
+    def match(self, texts):
+        """Sorted indexes of the goals found in any of the texts (never across two of them)"""
+        found = set(self.always)
+        goto, fail, output = self.goto, self.fail, self.output
+        state = 0
+        # The separator has no transition, so a match can't span two fields
+        for ch in "\0".join(t.lower() for t in texts):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if output[state]:
+                found.update(output[state])
+        return sorted(found)
+
+
+_matcher_cache = {}
+
+
+def get_goal_matcher(goals):
+    """The compiled matcher for a goal list, rebuilt only when the goal texts change"""
+    key = goals_hash(goals)
+    if key not in _matcher_cache:
+        _matcher_cache.clear()
+        _matcher_cache[key] = GoalMatcher(goals)
+    return _matcher_cache[key]
+
+
+def goal_links(entry, goals):
+    """Indexes of the goals whose text appears in the entry"""
+    return get_goal_matcher(goals).match([entry.get(field, '') or '' for field in GOAL_TEXT_FIELDS])
+
+
+def _cached_goal_links(conn, content_hash, current_goals_hash):
+    row = conn.execute("SELECT goals FROM goal_matches WHERE content_hash = ? AND goals_hash = ?",
+                       (content_hash, current_goals_hash)).fetchone()
+    return json.loads(row[0]) if row else None
+
+
+def _match_goals(conn, entry, content_hash, current_goals_hash, goals):
+    links = _cached_goal_links(conn, content_hash, current_goals_hash)
+    if links is None:
+        links = goal_links(entry, goals)
+        conn.execute("INSERT OR REPLACE INTO goal_matches VALUES (?, ?, ?)",
+                     (content_hash, current_goals_hash, json.dumps(links)))
+    return links
+
+
+def _hash_file(path):
+    with open(path, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def _store_node(conn, filename, entry, stat, content_hash, current_goals_hash, goals):
+    conn.execute("DELETE FROM graph_tags WHERE filename = ?", (filename,))
+    conn.executemany("INSERT OR IGNORE INTO graph_tags VALUES (?, ?)",
+                     [(tag.lower(), filename) for tag in entry.get('tags', [])])
+    conn.execute(
+        "INSERT OR REPLACE INTO graph_nodes VALUES (?, ?, ?, ?, ?, ?, ?)",
+        (filename, stat.st_mtime_ns, stat.st_size, content_hash, current_goals_hash,
+         json.dumps(_match_goals(conn, entry, content_hash, current_goals_hash, goals)), int('feedback' in entry)),
+    )
+
+
+def _relink_goals(conn, filename, stat, goals_json, current_goals_hash):
+    conn.execute("UPDATE graph_nodes SET mtime_ns = ?, size = ?, goals_hash = ?, goals = ? WHERE filename = ?",
+                 (stat.st_mtime_ns, stat.st_size, current_goals_hash, goals_json, filename))
+
+
+def _prune_goal_matches(conn):
+    conn.execute("DELETE FROM goal_matches WHERE content_hash NOT IN (SELECT content_hash FROM graph_nodes)")
+    conn.execute(
+        "DELETE FROM goal_matches WHERE goals_hash NOT IN ("
+        "SELECT goals_hash FROM goal_matches GROUP BY goals_hash ORDER BY MAX(rowid) DESC LIMIT ?)",
+        (GOAL_MATCH_GENERATIONS,))
+
+
+def update_graph(goals):
+    """Bring the graph up to date, re-reading only entries whose content (or the goal list) changed"""
+    from ui.index import connect, DATA_DIR, ENTRY_FILE_RE
+    from ui.viewer import iter_entries
+    if not os.path.exists(DATA_DIR):
+        return
+    current_goals_hash = goals_hash(goals)
+    with closing(connect()) as conn, conn:
+        known = {row[0]: tuple(row[1:]) for row in conn.execute(
+            "SELECT filename, mtime_ns, size, content_hash, goals_hash FROM graph_nodes")}
+        seen = set()
+        changed = {}
+        relink = {}
+        with os.scandir(DATA_DIR) as it:
+            for item in it:
+                if not ENTRY_FILE_RE.match(item.name):
+                    continue
+                seen.add(item.name)
+                stat = item.stat()
+                previous = known.get(item.name)
+                same_stat = previous is not None and previous[:2] == (stat.st_mtime_ns, stat.st_size)
+                if same_stat and previous[3] == current_goals_hash:
+                    continue
+                content_hash = previous[2] if same_stat else _hash_file(item.path)
+                if previous is None or previous[2] != content_hash:
+                    changed[item.name] = (stat, content_hash)
+                elif previous[3] == current_goals_hash:
+                    # Touched but unchanged: remember the new stat so the next scan skips the hash
+                    conn.execute("UPDATE graph_nodes SET mtime_ns = ?, size = ? WHERE filename = ?",
+                                 (stat.st_mtime_ns, stat.st_size, item.name))
+                else:
+                    # Only the goal list changed: tags stand, goal links come from the cache or a re-match
+                    links = _cached_goal_links(conn, content_hash, current_goals_hash)
+                    if links is None:
+                        relink[item.name] = (stat, content_hash)
+                    else:
+                        _relink_goals(conn, item.name, stat, json.dumps(links), current_goals_hash)
+        for fname, entry in iter_entries(sorted(changed) + sorted(relink)):
+            if not isinstance(entry, dict):
+                continue
+            if fname in changed:
+                stat, content_hash = changed[fname]
+                _store_node(conn, fname, entry, stat, content_hash, current_goals_hash, goals)
+            else:
+                stat, content_hash = relink[fname]
+                links = _match_goals(conn, entry, content_hash, current_goals_hash, goals)
+                _relink_goals(conn, fname, stat, json.dumps(links), current_goals_hash)
+        for fname in known:
+            if fname not in seen:
+                conn.execute("DELETE FROM graph_nodes WHERE filename = ?", (fname,))
+                conn.execute("DELETE FROM graph_tags WHERE filename = ?", (fname,))
+        _prune_goal_matches(conn)
+
+
+class LinkGraph:
+    """Adjacency lists over logs, goals and feedback, loaded once per graph view.
+
+    Nodes are ("log", filename), ("goal", index) or ("feedback", filename). Related
+    logs are found through the tag lists, so popular tags are never expanded pairwise.
+    """
+
+    def __init__(self, goals):
+        from ui.index import connect
+        self.goals = goals
+        self.tags_by_file = defaultdict(list)
+        self.files_by_tag = defaultdict(list)
+        self.goals_by_file = {}
+        self.logs_by_goal = defaultdict(list)
+        self.feedback = set()
+        self.related_cache = {}
+        with closing(connect()) as conn:
+            for fname, goal_idx, has_feedback in conn.execute(
+                    "SELECT filename, goals, has_feedback FROM graph_nodes ORDER BY filename"):
+                linked = [idx for idx in json.loads(goal_idx) if idx < len(goals)]
+                self.goals_by_file[fname] = linked
+                for idx in linked:
+                    self.logs_by_goal[idx].append(fname)
+                if has_feedback:
+                    self.feedback.add(fname)
+            for tag, fname in conn.execute("SELECT tag, filename FROM graph_tags ORDER BY tag, filename"):
+                self.tags_by_file[fname].append(tag)
+                self.files_by_tag[tag].append(fname)
+        self.logs = list(self.goals_by_file)
+
+    def nodes(self):
+        return [("log", fname) for fname in self.logs] + [("goal", idx) for idx in range(len(self.goals))]
+
+    def related_logs(self, fname):
+        """Logs sharing a tag with `fname`, sorted; the union is cached per tag set"""
+        tags = tuple(self.tags_by_file[fname])
+        related = self.related_cache.get(tags)
+        if related is None:
+            if len(tags) == 1:
+                related = self.files_by_tag[tags[0]]
+            else:
+                related = sorted({other for tag in tags for other in self.files_by_tag[tag]})
+            self.related_cache[tags] = related
+        return [other for other in related if other != fname]
+
+    def _linked(self, node):
+        """Goal and feedback edges of a node, i.e. everything but related logs"""
+        kind, key = node
+        if kind == "log":
+            edges = [("goal", ("goal", idx)) for idx in self.goals_by_file.get(key, [])]
+            if key in self.feedback:
+                edges.append(("feedback", ("feedback", key)))
+            return edges
+        if kind == "goal":
+            return [("goal", ("log", fname)) for fname in self.logs_by_goal.get(key, [])]
+        return [("feedback", ("log", key))]
+
+    def neighbors(self, node):
+        """(edge kind, node) pairs reachable from a node in one hop"""
+        kind, key = node
+        edges = [("tag", ("log", other)) for other in self.related_logs(key)] if kind == "log" else []
+        return edges + self._linked(node)
+
+    def neighborhood(self, focus, depth):
+        """Nodes within `depth` hops of `focus` in breadth-first order, as (node, distance).
+
+        Tags act as intermediate nodes: each tag's logs are expanded once per walk, the
+        first time a log carrying it is reached, so a tag shared by every log costs one
+        pass over its list rather than one per log.
+        """
+        distance = {focus: 0}
+        expanded_tags = set()
+        queue = deque([focus])
+        order = []
+        while queue:
+            node = queue.popleft()
+            order.append((node, distance[node]))
+            if distance[node] == depth:
+                continue
+            reached = []
+            if node[0] == "log":
+                new_logs = set()
+                for tag in self.tags_by_file[node[1]]:
+                    if tag not in expanded_tags:
+                        expanded_tags.add(tag)
+                        new_logs.update(fname for fname in self.files_by_tag[tag] if ("log", fname) not in distance)
+                reached = [("log", fname) for fname in sorted(new_logs)]
+            reached += [other for _, other in self._linked(node)]
+            for other in reached:
+                if other not in distance:
+                    distance[other] = distance[node] + 1
+                    queue.append(other)
+        return order
+
+    def find(self, text):
+        """Resolve a date (YYYY-MM-DD), goal number or goal text to a node, or None"""
+        text = text.strip()
+        if text + ".json" in self.goals_by_file:
+            return ("log", text + ".json")
+        if text.isdigit() and 1 <= int(text) <= len(self.goals):
+            return ("goal", int(text) - 1)
+        for idx, goal in enumerate(self.goals):
+            if text and text.lower() in goal['goal'].lower():
+                return ("goal", idx)
+        return None
+
+    def label(self, node):
+        kind, key = node
+        if kind == "goal":
+            return f"[goal] {self.goals[key]['goal']}"
+        return f"[{kind}] {key.replace('.json', '')}"
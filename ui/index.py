@@ -0,0 +1,189 @@
+import os
+import re
+import json
+import sqlite3
+from contextlib import closing
+from ui.search import SEARCH_SCHEMA, update_postings, remove_postings
+from ui.streaks import STREAKS_SCHEMA, record_days, check_aggregates
+from ui.mood import MOOD_SCHEMA
+from ui.graph import GRAPH_SCHEMA
+from ui.render import RENDER_SCHEMA
+
+DATA_DIR = os.path.expanduser("~/.standlog/entries")
+INDEX_PATH = os.path.expanduser("~/.standlog/index.db")
+ENTRY_FILE_RE = re.compile(r'\d{4}-\d{2}-\d{2}\.json$')
+DID_PREVIEW_LENGTH = 80
+# Voice-note transcripts sit next to their entry as <date>.transcript.json
+TRANSCRIPT_SUFFIX = ".transcript.json"
+# With encryption on, entry text stays out of the index; only whether an entry had blockers is kept
+REDACTED_TEXT = "(encrypted)"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    filename TEXT PRIMARY KEY,
+    date TEXT NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    tags TEXT NOT NULL,
+    time_spent INTEGER NOT NULL,
+    pomodoro_count INTEGER NOT NULL,
+    mood TEXT,
+    blockers TEXT NOT NULL,
+    did_preview TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_date ON entries(date);
+"""
+
+
+def connect():
+    """Open the index database, creating the schema if needed"""
+    os.makedirs(os.path.dirname(INDEX_PATH), exist_ok=True)
+    conn = sqlite3.connect(INDEX_PATH)
+    conn.row_factory = sqlite3.Row
+    conn.executescript(SCHEMA)
+    conn.executescript(SEARCH_SCHEMA)
+    conn.executescript(STREAKS_SCHEMA)
+    conn.executescript(MOOD_SCHEMA)
+    conn.executescript(GRAPH_SCHEMA)
+    conn.executescript(RENDER_SCHEMA)
+    return conn
+
+
+def _to_int(value):
+    try:
+        return int(value)
+    except Exception:
+        return 0
+
+
+def transcript_path(filename):
+    return os.path.join(DATA_DIR, filename.replace('.json', TRANSCRIPT_SUFFIX))
+
+
+def load_transcript(filename):
+    """Text of the voice-note transcript attached to an entry, or an empty string"""
+    path = transcript_path(filename)
+    if not os.path.exists(path):
+        return ""
+    from ui.viewer import get_fernet
+    with open(path, "rb") as f:
+        raw = f.read()
+    fernet = get_fernet()
+    try:
+        if fernet and not raw.lstrip().startswith(b"{"):
+            raw = fernet.decrypt(raw)
+        return json.loads(raw.decode()).get("text", "")
+    except Exception:
+        # Quietly: this runs for every entry during a refresh
+        return ""
+
+
+def _store(conn, filename, entry, stat):
+    from ui.viewer import get_fernet
+    mood = entry.get("mood")
+    blockers = entry.get("blockers", "") or ""
+    did_preview = (entry.get("did", "") or "")[:DID_PREVIEW_LENGTH]
+    if get_fernet():
+        blockers = REDACTED_TEXT if blockers.strip() else ""
+        did_preview = ""
+    conn.execute(
+        "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (
+            filename,
+            filename.replace('.json', ''),
+            stat.st_mtime_ns,
+            stat.st_size,
+            json.dumps(entry.get("tags", [])),
+            _to_int(entry.get("time_spent", 0)),
+            _to_int(entry.get("pomodoro_count", 0)),
+            str(mood) if mood else None,
+            blockers,
+            did_preview,
+        ),
+    )
+    # The transcript is decrypted text too; update_postings only stores hashed terms for it
+    # while encryption is on, like the rest of the entry
+    update_postings(conn, filename, dict(entry, voice_transcript=load_transcript(filename)))
+
+
+def index_entry(filename, entry):
+    """Update the index row for an entry that was just written"""
+    path = os.path.join(DATA_DIR, filename)
+    if not ENTRY_FILE_RE.match(filename) or not os.path.exists(path):
+        return
+    with closing(connect()) as conn, conn:
+        _store(conn, filename, entry, os.stat(path))
+        record_days(conn, [filename.replace('.json', '')])
+
+
+def refresh_index():
+    """Re-parse only the entry files whose mtime or size changed since the last refresh"""
+    if not os.path.exists(DATA_DIR):
+        return
+    from ui.viewer import iter_entries
+    with closing(connect()) as conn, conn:
+        known = {row["filename"]: (row["mtime_ns"], row["size"])
+                 for row in conn.execute(
+                     "SELECT filename, mtime_ns, size FROM entries JOIN documents USING (filename)")}
+        seen = set()
+        changed = {}
+        with os.scandir(DATA_DIR) as it:
+            for item in it:
+                if not ENTRY_FILE_RE.match(item.name):
+                    continue
+                seen.add(item.name)
+                stat = item.stat()
+                if known.get(item.name) != (stat.st_mtime_ns, stat.st_size):
+                    changed[item.name] = stat
+        stored = []
+        for fname, entry in iter_entries(sorted(changed)):
+            if isinstance(entry, dict):
+                _store(conn, fname, entry, changed[fname])
+                stored.append(fname.replace('.json', ''))
+        for fname in known:
+            if fname not in seen:
+                conn.execute("DELETE FROM entries WHERE filename = ?", (fname,))
+                conn.execute("DELETE FROM render_fragments WHERE filename = ?", (fname,))
+                remove_postings(conn, fname)
+        record_days(conn, stored)
+        check_aggregates(conn)
+
+
+def reset_text_index():
+    """Scrub entry text and search postings from the index and have the next refresh
+    re-store every entry.
+
+    Called when encryption is turned on or off so the index follows the new setting.
+    """
+    with closing(connect()) as conn:
+        with conn:
+            conn.execute("DELETE FROM postings")
+            conn.execute("DELETE FROM documents")
+            conn.execute(
+                "UPDATE entries SET mtime_ns = -1, did_preview = '', "
+                "blockers = CASE WHEN TRIM(blockers) = '' THEN '' ELSE ? END",
+                (REDACTED_TEXT,),
+            )
+        # Overwritten text can linger in free pages until the file is rebuilt
+        conn.execute("VACUUM")
+
+
+def _row_to_dict(row):
+    return {
+        "filename": row["filename"],
+        "date": row["date"],
+        "tags": json.loads(row["tags"]),
+        "time_spent": row["time_spent"],
+        "pomodoro_count": row["pomodoro_count"],
+        "mood": row["mood"],
+        "blockers": row["blockers"],
+        "did_preview": row["did_preview"],
+    }
+
+
+def get_indexed_entries():
+    """Return the indexed summary of every entry, oldest first"""
+    refresh_index()
+    with closing(connect()) as conn:
+        rows = conn.execute("SELECT * FROM entries ORDER BY date").fetchall()
+    return [_row_to_dict(row) for row in rows]
@@ -0,0 +1,229 @@
+import os
+import json
+from contextlib import closing
+import numpy as np
+from ui.storage import write_json
+
+METRICS_DIR = os.path.expanduser("~/.standlog/metrics")
+METRICS_META_PATH = os.path.join(METRICS_DIR, "meta.json")
+MOOD_LOG_PATH = os.path.expanduser("~/.standlog/mood_log.jsonl")
+POMODORO_DATA_PATH = os.path.expanduser("~/.standlog/pomodoro_data.json")
+POMODORO_LOG_PATH = os.path.expanduser("~/.standlog/pomodoro_sessions.jsonl")
+MOOD_LEVELS = ["1", "2", "3", "4", "5"]
+
+# One fixed-width array per metric, indexed by days since meta["start"]
+COLUMNS = {
+    "present": np.uint8,
+    "time_spent": np.int32,
+    "pomodoro_count": np.int32,
+    "mood": np.int8,
+    "blockers": np.uint8,
+    "pomodoro_sessions": np.int32,
+    "pomodoro_minutes": np.int32,
+}
+
+
+def _file_signature(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def _sources_signature():
+    from ui.index import connect, refresh_index
+    refresh_index()
+    with closing(connect()) as conn:
+        entries = list(conn.execute("SELECT COUNT(*), MAX(mtime_ns), SUM(size) FROM entries").fetchone())
+    return {
+        "entries": entries,
+        "mood": _file_signature(MOOD_LOG_PATH),
+        "pomodoro": _file_signature(POMODORO_DATA_PATH),
+        "pomodoro_log": os.path.getsize(POMODORO_LOG_PATH) if os.path.exists(POMODORO_LOG_PATH) else 0,
+    }
+
+
+def _column_path(name):
+    return os.path.join(METRICS_DIR, f"{name}.bin")
+
+
+def _day_offsets(dates, start):
+    return (np.array(dates, dtype="datetime64[D]") - start).astype(np.int64)
+
+
+def _is_day(date):
+    try:
+        np.datetime64(date, "D")
+    except (ValueError, TypeError):
+        return False
+    return True
+
+
+def rebuild_metrics(signature=None):
+    """Rewrite every column from the entry index, mood data and pomodoro sessions"""
+    from ui.index import get_indexed_entries
+    from ui.mood import load_mood_data
+    from ui.pomodoro import load_pomodoro_data
+    if signature is None:
+        signature = _sources_signature()
+    # Skip days that don't parse, so one bad row can't break every metrics view
+    rows = [row for row in get_indexed_entries() if _is_day(row["date"])]
+    moods = {date: int(value["mood"]) for date, value in load_mood_data().items()
+             if str(value.get("mood", "")) in MOOD_LEVELS and _is_day(date)}
+    sessions = {date: day for date, day in load_pomodoro_data().items() if _is_day(date)}
+    all_dates = [row["date"] for row in rows] + list(moods) + list(sessions)
+    os.makedirs(METRICS_DIR, exist_ok=True)
+    if not all_dates:
+        meta = {"start": None, "days": 0, "signature": signature}
+        write_json(METRICS_META_PATH, meta)
+        return meta
+    start = np.datetime64(min(all_dates), "D")
+    days = int((np.datetime64(max(all_dates), "D") - start).astype(np.int64)) + 1
+    columns = {name: np.memmap(_column_path(name), dtype=dtype, mode="w+", shape=(days,))
+               for name, dtype in COLUMNS.items()}
+    for column in columns.values():
+        column[:] = 0
+    if rows:
+        idx = _day_offsets([row["date"] for row in rows], start)
+        columns["present"][idx] = 1
+        columns["time_spent"][idx] = [row["time_spent"] for row in rows]
+        columns["pomodoro_count"][idx] = [row["pomodoro_count"] for row in rows]
+        columns["blockers"][idx] = [1 if row["blockers"].strip() else 0 for row in rows]
+    if moods:
+        columns["mood"][_day_offsets(list(moods), start)] = list(moods.values())
+    if sessions:
+        idx = _day_offsets(list(sessions), start)
+        columns["pomodoro_sessions"][idx] = [len(s) for s in sessions.values()]
+        columns["pomodoro_minutes"][idx] = [sum(x.get("duration_minutes", 0) for x in s) for s in sessions.values()]
+    for column in columns.values():
+        column.flush()
+    meta = {"start": str(start), "days": days, "signature": signature}
+    write_json(METRICS_META_PATH, meta)
+    return meta
+
+
+def _open_columns(meta, names):
+    return {name: np.memmap(_column_path(name), dtype=COLUMNS[name], mode="r+", shape=(meta["days"],))
+            for name in names}
+
+
+def _update_changed_entries(meta, start, previous, current):
+    """Write entry rows modified since the last build into their columns.
+
+    Covers edits such as the pomodoro_count bump after every completed pomodoro.
+    Returns False when entries were added or removed, so a full rebuild is needed.
+    """
+    from ui.index import connect
+    if previous == current:
+        return True
+    if not previous or previous[0] != current[0] or previous[1] is None:
+        return False
+    with closing(connect()) as conn:
+        rows = conn.execute("SELECT date, time_spent, pomodoro_count, blockers FROM entries WHERE mtime_ns > ?",
+                            (previous[1],)).fetchall()
+    rows = [row for row in rows if _is_day(row["date"])]
+    if not rows:
+        return False
+    idx = _day_offsets([row["date"] for row in rows], start)
+    if idx.min() < 0 or idx.max() >= meta["days"]:
+        return False
+    columns = _open_columns(meta, ("present", "time_spent", "pomodoro_count", "blockers"))
+    present = int(columns["present"].sum())
+    columns["present"][idx] = 1
+    columns["time_spent"][idx] = [row["time_spent"] for row in rows]
+    columns["pomodoro_count"][idx] = [row["pomodoro_count"] for row in rows]
+    columns["blockers"][idx] = [1 if row["blockers"].strip() else 0 for row in rows]
+    # Same count but a different set of days means one entry replaced another
+    if int(columns["present"].sum()) != present:
+        return False
+    for column in columns.values():
+        column.flush()
+    return True
+
+
+def _append_pomodoro_sessions(meta, start, offset):
+    """Add sessions appended to the pomodoro log after a byte offset; False if a day is out of range"""
+    from ui.pomodoro import read_pomodoro_log
+    sessions, _ = read_pomodoro_log(offset)
+    if not sessions:
+        return True
+    idx = _day_offsets([s["date"] for s in sessions], start)
+    if idx.min() < 0 or idx.max() >= meta["days"]:
+        return False
+    columns = _open_columns(meta, ("pomodoro_sessions", "pomodoro_minutes"))
+    np.add.at(columns["pomodoro_sessions"], idx, 1)
+    np.add.at(columns["pomodoro_minutes"], idx, [s.get("duration_minutes", 0) for s in sessions])
+    for column in columns.values():
+        column.flush()
+    return True
+
+
+def _update_metrics(meta, signature):
+    """Update the columns in place when entries were only edited or pomodoros appended.
+
+    Returns the updated meta, or None when a full rebuild is needed instead.
+    """
+    previous = meta.get("signature") or {}
+    if not meta["days"] or any(previous.get(key) != signature[key] for key in ("mood", "pomodoro")):
+        return None
+    offset = previous.get("pomodoro_log", 0)
+    if signature["pomodoro_log"] < offset:
+        return None
+    start = np.datetime64(meta["start"], "D")
+    if not _update_changed_entries(meta, start, previous.get("entries"), signature["entries"]):
+        return None
+    if not _append_pomodoro_sessions(meta, start, offset):
+        return None
+    meta["signature"] = signature
+    write_json(METRICS_META_PATH, meta)
+    return meta
+
+
+def load_metrics():
+    """Return read-only memory-mapped metric columns, rebuilding them if a source changed.
+
+    The result holds "start" (numpy day), "days" and one array per name in COLUMNS,
+    or is None when there is no data at all.
+    """
+    signature = _sources_signature()
+    meta = None
+    if os.path.exists(METRICS_META_PATH):
+        try:
+            with open(METRICS_META_PATH) as f:
+                meta = json.load(f)
+        except Exception:
+            meta = None
+    if meta is None or not all(os.path.exists(_column_path(name)) for name in COLUMNS):
+        meta = rebuild_metrics(signature)
+    elif meta.get("signature") != signature:
+        # A completed pomodoro appends to its log and bumps today's entry: patch just those days
+        meta = _update_metrics(meta, signature) or rebuild_metrics(signature)
+    if not meta["days"]:
+        return None
+    metrics = {"start": np.datetime64(meta["start"], "D"), "days": meta["days"]}
+    for name, dtype in COLUMNS.items():
+        metrics[name] = np.memmap(_column_path(name), dtype=dtype, mode="r", shape=(meta["days"],))
+    return metrics
+
+
+def date_labels(metrics, idx):
+    """Turn day offsets into YYYY-MM-DD strings"""
+    return [str(day) for day in metrics["start"] + np.asarray(idx)]
+
+
+def rolling_mean(values, window):
+    """Trailing mean over `window` samples, one value per full window"""
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) < window:
+        return np.array([])
+    cumsum = np.cumsum(np.insert(values, 0, 0.0))
+    return (cumsum[window:] - cumsum[:-window]) / window
+
+
+def group_means(keys, values, size):
+    """Mean of `values` for each integer key in range(size); NaN where a key is absent"""
+    counts = np.bincount(keys, minlength=size)
+    sums = np.bincount(keys, weights=values, minlength=size)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return sums / counts, counts
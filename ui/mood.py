@@ -1,20 +1,35 @@
 from rich.console import Console
 from rich.panel import Panel
 from rich.prompt import Prompt
-from rich.table import Table
 from rich import box
-from rich.columns import Columns
 from rich.text import Text
 from datetime import datetime, timedelta
 import os
 import json
-import re
-from collections import defaultdict
+from contextlib import closing
+from ui.storage import write_text, appending
 
 console = Console()
 
 
+# Legacy whole-file store, imported into the journal once
 MOOD_DATA_PATH = os.path.expanduser("~/.standlog/mood_data.json")
+MOOD_LOG_PATH = os.path.expanduser("~/.standlog/mood_log.jsonl")
+
+# The journal is the source of truth; this date index lives in index.db and can be replayed from it
+MOOD_SCHEMA = """
+CREATE TABLE IF NOT EXISTS moods (
+    date TEXT PRIMARY KEY,
+    mood TEXT NOT NULL,
+    timestamp TEXT
+);
+CREATE TABLE IF NOT EXISTS mood_journal (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    offset INTEGER NOT NULL,
+    inode INTEGER
+);
+INSERT OR IGNORE INTO mood_journal VALUES (0, 0, NULL);
+"""
 
 MOOD_EMOJIS = {
     "1": "😢 Very Sad",
@@ -32,23 +47,66 @@ MOOD_COLORS = {
     "5": "magenta"
 }
 
-def load_mood_data():
-    """Load mood data from file"""
-    if not os.path.exists(MOOD_DATA_PATH):
-        return {}
+def _migrate_legacy_data():
+    """Seed the journal from mood_data.json the first time the journal is used"""
+    if os.path.exists(MOOD_LOG_PATH) or not os.path.exists(MOOD_DATA_PATH):
+        return
     try:
         with open(MOOD_DATA_PATH, 'r') as f:
-            return json.load(f)
+            data = json.load(f)
     except Exception as e:
         console.print(f"[yellow]Error loading mood data: {e}[/yellow]")
-        return {}
+        return
+    save_mood_data(data)
+
+def _sync_journal(conn):
+    """Replay journal lines appended since the last sync into the date index"""
+    _migrate_legacy_data()
+    offset, inode = conn.execute("SELECT offset, inode FROM mood_journal WHERE id = 0").fetchone()
+    try:
+        stat = os.stat(MOOD_LOG_PATH)
+    except OSError:
+        stat = None
+    # A rewritten journal (new inode) or a truncated one is replayed from the start
+    if stat is None or stat.st_ino != inode or stat.st_size < offset:
+        conn.execute("DELETE FROM moods")
+        offset = 0
+    if stat is not None and stat.st_size > offset:
+        with open(MOOD_LOG_PATH, 'rb') as f:
+            f.seek(offset)
+            chunk = f.read()
+        complete = chunk[:chunk.rfind(b"\n") + 1]
+        rows = []
+        for line in complete.splitlines():
+            try:
+                record = json.loads(line)
+                rows.append((record["date"], str(record["mood"]), record.get("timestamp")))
+            except Exception:
+                continue
+        conn.executemany("INSERT OR REPLACE INTO moods VALUES (?, ?, ?)", rows)
+        offset += len(complete)
+    conn.execute("UPDATE mood_journal SET offset = ?, inode = ? WHERE id = 0",
+                 (offset, stat.st_ino if stat else None))
+
+def _connect():
+    from ui.index import connect
+    conn = connect()
+    with conn:
+        _sync_journal(conn)
+    return conn
+
+def load_mood_data():
+    """Load all mood data as {date: {"mood", "timestamp"}}, oldest first"""
+    with closing(_connect()) as conn:
+        rows = conn.execute("SELECT date, mood, timestamp FROM moods ORDER BY date").fetchall()
+    return {date: {"mood": mood, "timestamp": timestamp} for date, mood, timestamp in rows}
 
 def save_mood_data(data):
-    """Save mood data to file"""
-    os.makedirs(os.path.dirname(MOOD_DATA_PATH), exist_ok=True)
+    """Replace the mood journal with the given {date: {"mood", "timestamp"}} data"""
+    lines = [json.dumps({"date": date, "mood": data[date]["mood"], "timestamp": data[date].get("timestamp")}) + "\n"
+             for date in sorted(data) if data[date].get("mood")]
     try:
-        with open(MOOD_DATA_PATH, 'w') as f:
-            json.dump(data, f, indent=2)
+        write_text(MOOD_LOG_PATH, "".join(lines))
     except Exception as e:
         console.print(f"[red]Error saving mood data: {e}[/red]")
 
@@ -67,60 +125,63 @@ def log_mood(mood, date=None):
     if date is None:
         date = datetime.now().strftime("%Y-%m-%d")
     
-    data = load_mood_data()
-    
-    if date not in data:
-        data[date] = {}
-    
-    data[date]["mood"] = mood
-    data[date]["timestamp"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    
-    save_mood_data(data)
+    record = {"date": date, "mood": mood, "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
+    with closing(_connect()) as conn:
+        with appending(MOOD_LOG_PATH) as f:
+            f.write(json.dumps(record) + "\n")
+        with conn:
+            _sync_journal(conn)
     console.print(f"[green]Mood logged: {MOOD_EMOJIS[mood]}[/green]")
 
 def get_mood_for_date(date):
     """Get mood for a specific date"""
-    data = load_mood_data()
-    return data.get(date, {}).get("mood")
+    with closing(_connect()) as conn:
+        row = conn.execute("SELECT mood FROM moods WHERE date = ?", (date,)).fetchone()
+    return row[0] if row else None
+
+def get_recent_moods(limit=7):
+    """Return (date, mood) pairs for the most recent `limit` logged days, oldest first"""
+    with closing(_connect()) as conn:
+        rows = conn.execute("SELECT date, mood FROM moods ORDER BY date DESC LIMIT ?", (limit,)).fetchall()
+    return [(date, mood) for date, mood in reversed(rows)]
 
 def show_mood_trends():
     """Show mood trends over time"""
-    data = load_mood_data()
+    from ui.metrics import load_metrics, date_labels
+    import numpy as np
+    metrics = load_metrics()
+    logged = np.flatnonzero(metrics["mood"]) if metrics else []
     
-    if not data:
+    if not len(logged):
         console.print("[yellow]No mood data available yet.[/yellow]")
         return
-    sorted_dates = sorted(data.keys())
+    moods = metrics["mood"][logged]
 
+    from rich.table import Table
     table = Table(title="Mood History", box=box.ROUNDED)
     table.add_column("Date", style="cyan")
     table.add_column("Mood", style="magenta")
 
-    for date in sorted_dates[-14:]:  
-        mood = data[date].get("mood")
-        if mood:
-            mood_text = MOOD_EMOJIS[mood]
-            table.add_row(date, f"[{MOOD_COLORS[mood]}]{mood_text}[/{MOOD_COLORS[mood]}]")
+    for date, mood in zip(date_labels(metrics, logged[-14:]), moods[-14:].tolist()):
+        mood = str(mood)
+        mood_text = MOOD_EMOJIS[mood]
+        table.add_row(date, f"[{MOOD_COLORS[mood]}]{mood_text}[/{MOOD_COLORS[mood]}]")
     
     console.print(table)
     
-    mood_counts = defaultdict(int)
-    for date_data in data.values():
-        mood = date_data.get("mood")
-        if mood:
-            mood_counts[mood] += 1
-    
-    total_moods = sum(mood_counts.values())
+    mood_counts = np.bincount(moods, minlength=6)
+    total_moods = int(mood_counts.sum())
     if total_moods > 0:
         console.print("\n[bold]Mood Distribution:[/bold]")
-        for mood, count in sorted(mood_counts.items()):
-            percentage = (count / total_moods) * 100
+        for mood in np.flatnonzero(mood_counts).tolist():
+            mood = str(mood)
+            percentage = (mood_counts[int(mood)] / total_moods) * 100
             bar = "█" * int(percentage / 5)
             console.print(f"[{MOOD_COLORS[mood]}]{MOOD_EMOJIS[mood]}: {bar} {percentage:.1f}%[/{MOOD_COLORS[mood]}]")
     
-    if len(sorted_dates) >= 3:
+    if len(logged) >= 3:
         console.print("\n[bold]Mood Trend:[/bold]")
-        recent_moods = [int(data[date].get("mood", "3")) for date in sorted_dates[-7:] if "mood" in data[date]]
+        recent_moods = moods[-7:].tolist()
         
         if recent_moods:
             trend_line = ""
@@ -141,83 +202,65 @@ def show_mood_trends():
 
 def correlate_mood_with_productivity():
     """Correlate mood with productivity and blockers"""
-    from main import DATA_DIR
+    from ui.metrics import load_metrics, group_means
+    import numpy as np
     
-    mood_data = load_mood_data()
-    if not mood_data:
+    metrics = load_metrics()
+    if metrics is None or not metrics["mood"].any():
         console.print("[yellow]No mood data available for correlation.[/yellow]")
         return
-    log_entries = {}
-    files = [f for f in os.listdir(DATA_DIR) if f.endswith('.json') and re.match(r'\d{4}-\d{2}-\d{2}\.json$', f)]
-    
-    for fname in files:
-        date = fname.replace('.json', '')
-        try:
-            with open(os.path.join(DATA_DIR, fname)) as f:
-                log_entries[date] = json.load(f)
-        except Exception:
-            continue
-
-    common_dates = set(mood_data.keys()) & set(log_entries.keys())
+    common = np.flatnonzero((metrics["mood"] > 0) & (metrics["present"] > 0))
     
-    if not common_dates:
+    if not len(common):
         console.print("[yellow]No overlapping data between mood and logs for correlation.[/yellow]")
         return
     
-    mood_productivity = defaultdict(list)
-    mood_blockers = defaultdict(int)
-    
-    for date in common_dates:
-        mood = mood_data[date].get("mood")
-        if not mood:
-            continue
-        
-        time_spent = log_entries[date].get("time_spent", 0)
-        pomodoro_count = log_entries[date].get("pomodoro_count", 0)
-        has_blockers = bool(log_entries[date].get("blockers", "").strip())
-        mood_productivity[mood].append((time_spent, pomodoro_count))
-        if has_blockers:
-            mood_blockers[mood] += 1
+    moods = metrics["mood"][common].astype(np.int64)
+    times = metrics["time_spent"][common].astype(np.float64)
+    pomodoros = metrics["pomodoro_count"][common].astype(np.float64)
+    avg_times, counts = group_means(moods, times, 6)
+    avg_pomodoros, _ = group_means(moods, pomodoros, 6)
+    blocker_days = np.bincount(moods, weights=metrics["blockers"][common], minlength=6)
+    present_moods = [str(m) for m in np.flatnonzero(counts).tolist()]
     console.print(Panel("[bold cyan]Mood & Productivity Correlation[/bold cyan]", expand=False))
+    from rich.table import Table
     table = Table(title="Mood vs. Productivity", box=box.ROUNDED)
     table.add_column("Mood", style="cyan")
     table.add_column("Avg. Time (min)", style="green")
     table.add_column("Avg. Pomodoros", style="magenta")
     table.add_column("Correlation", style="yellow")
     
-    for mood in sorted(mood_productivity.keys()):
-        data_points = mood_productivity[mood]
-        avg_time = sum(point[0] for point in data_points) / len(data_points) if data_points else 0
-        avg_pomodoros = sum(point[1] for point in data_points) / len(data_points) if data_points else 0
-        if avg_time > 90 or avg_pomodoros > 3:
+    for mood in present_moods:
+        avg_time = avg_times[int(mood)]
+        avg_pomodoro = avg_pomodoros[int(mood)]
+        if avg_time > 90 or avg_pomodoro > 3:
             correlation = "[green]High productivity[/green]"
-        elif avg_time > 45 or avg_pomodoros > 1:
+        elif avg_time > 45 or avg_pomodoro > 1:
             correlation = "[blue]Moderate productivity[/blue]"
         else:
             correlation = "[yellow]Lower productivity[/yellow]"   
         table.add_row(
             f"[{MOOD_COLORS[mood]}]{MOOD_EMOJIS[mood]}[/{MOOD_COLORS[mood]}]", 
             f"{avg_time:.1f}", 
-            f"{avg_pomodoros:.1f}",
+            f"{avg_pomodoro:.1f}",
             correlation
         )
     console.print(table)
+    blocker_moods = [mood for mood in present_moods if blocker_days[int(mood)] > 0]
     console.print("\n[bold]Mood vs. Blockers:[/bold]")
-    for mood in sorted(mood_blockers.keys()):
-        total_entries = len(mood_productivity[mood])
-        blocker_entries = mood_blockers[mood]
-        percentage = (blocker_entries / total_entries) * 100 if total_entries else 0
+    for mood in blocker_moods:
+        percentage = (blocker_days[int(mood)] / counts[int(mood)]) * 100
         bar = "█" * int(percentage / 10)
         console.print(f"[{MOOD_COLORS[mood]}]{MOOD_EMOJIS[mood]}: {bar} {percentage:.1f}% days with blockers[/{MOOD_COLORS[mood]}]")
     console.print("\n[bold]Insights:[/bold]")
-    if mood_productivity:
-        best_mood = max(mood_productivity.keys(), 
-                       key=lambda m: sum(p[0] + p[1]*25 for p in mood_productivity[m]) / len(mood_productivity[m]) if mood_productivity[m] else 0)
-        console.print(f"[green]You tend to be most productive when your mood is: [{MOOD_COLORS[best_mood]}]{MOOD_EMOJIS[best_mood]}[/{MOOD_COLORS[best_mood]}][/green]")
-    if mood_blockers:
-        fewest_blockers_mood = min(mood_blockers.keys(), 
-                                 key=lambda m: mood_blockers[m] / len(mood_productivity[m]) if mood_productivity[m] else float('inf'))
+    best_mood = max(present_moods, key=lambda m: avg_times[int(m)] + avg_pomodoros[int(m)] * 25)
+    console.print(f"[green]You tend to be most productive when your mood is: [{MOOD_COLORS[best_mood]}]{MOOD_EMOJIS[best_mood]}[/{MOOD_COLORS[best_mood]}][/green]")
+    if blocker_moods:
+        fewest_blockers_mood = min(blocker_moods, key=lambda m: blocker_days[int(m)] / counts[int(m)])
         console.print(f"[cyan]You report fewer blockers when your mood is: [{MOOD_COLORS[fewest_blockers_mood]}]{MOOD_EMOJIS[fewest_blockers_mood]}[/{MOOD_COLORS[fewest_blockers_mood]}][/cyan]")
+    if len(common) >= 3 and times.std() > 0 and moods.std() > 0:
+        r = np.corrcoef(moods, times)[0, 1]
+        console.print(f"[dim]Mood/time correlation coefficient: {r:+.2f}[/dim]")
 def mood_menu():
     """Main mood tracking menu"""
     while True:
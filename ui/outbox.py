@@ -0,0 +1,258 @@
+from rich.console import Console
+from rich.table import Table
+from rich import box
+from datetime import datetime
+import os
+import time
+import uuid
+import smtplib
+import threading
+from ui.storage import write_json, read_json, locked
+
+console = Console()
+
+# One JSON file per message; the queue survives restarts and unsent mail is retried next run
+OUTBOX_DIR = os.path.expanduser("~/.standlog/outbox")
+EMAIL_CONFIG_PATH = os.path.expanduser("~/.standlog/email.json")
+# Held while delivering, so two StandLog processes never send the same message
+SENDER_LOCK_PATH = os.path.join(OUTBOX_DIR, "sender", "lock")
+OUTBOX_MAX_ATTEMPTS = 5
+OUTBOX_RETRY_SECONDS = 30  # doubled after every failed attempt
+OUTBOX_IDLE_SECONDS = 60  # close the SMTP connection after this long without mail
+OUTBOX_KEEP_SENT = 20
+
+
+def _message_path(message_id):
+    return os.path.join(OUTBOX_DIR, f"{message_id}.json")
+
+
+def list_messages():
+    """All messages in the outbox, oldest first"""
+    if not os.path.exists(OUTBOX_DIR):
+        return []
+    messages = []
+    for name in os.listdir(OUTBOX_DIR):
+        if name.endswith(".json"):
+            try:
+                messages.append(read_json(os.path.join(OUTBOX_DIR, name)))
+            except Exception:
+                continue
+    return sorted(messages, key=lambda m: (m["created"], m["id"]))
+
+
+def _seal_body(body):
+    """The body as stored on disk: Fernet-encrypted while journal encryption is on"""
+    from ui.viewer import get_fernet
+    f = get_fernet()
+    if not f:
+        return body, False
+    return f.encrypt(body.encode()).decode(), True
+
+
+def _open_body(message):
+    if not message.get("encrypted"):
+        return message["body"]
+    from ui.viewer import get_fernet
+    f = get_fernet()
+    if not f:
+        raise RuntimeError("message is encrypted but encryption is no longer enabled")
+    # InvalidToken propagates so the message is retried rather than sent garbled
+    return f.decrypt(message["body"].encode()).decode()
+
+
+def enqueue_email(to, subject, body):
+    """Queue a message for the background sender and return it"""
+    now = time.time()
+    body, encrypted = _seal_body(body)
+    message = {
+        "id": f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}",
+        "to": to,
+        "subject": subject,
+        "body": body,
+        "encrypted": encrypted,
+        "created": now,
+        "status": "queued",
+        "attempts": 0,
+        "next_attempt": now,
+        "last_error": None,
+        "sent_at": None,
+    }
+    write_json(_message_path(message["id"]), message)
+    get_outbox_sender().wake()
+    return message
+
+
+def smtp_client(config):
+    """A yagmail client for the email config; host, port, smtp_ssl, smtp_starttls and
+    smtp_skip_login override the Gmail defaults (e.g. for a local aiosmtpd server)"""
+    import yagmail
+    options = {key: config[key] for key in ("host", "port", "smtp_ssl", "smtp_starttls", "smtp_skip_login")
+               if key in config}
+    return yagmail.SMTP(config.get("user"), config.get("password"), **options)
+
+
+class OutboxSender:
+    """Background thread delivering queued messages over one reused SMTP connection.
+
+    yagmail's send() logs in again on every call, so messages are prepared with
+    prepare_send() and written to the already-open connection instead.
+    """
+
+    def __init__(self):
+        self.client = None
+        self.last_used = 0.0
+        self.thread = None
+        self.guard = threading.Lock()
+        self.wake_event = threading.Event()
+
+    def wake(self):
+        """Deliver due messages now, starting the thread if it is not running"""
+        with self.guard:
+            self.wake_event.set()
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, daemon=True)
+                self.thread.start()
+
+    def _run(self):
+        while True:
+            self.wake_event.clear()
+            try:
+                delay = self.drain()
+            except Exception as e:
+                console.print(f"[red]Email outbox error: {e}[/red]")
+                delay = OUTBOX_RETRY_SECONDS
+            if self.client is not None and time.monotonic() - self.last_used >= OUTBOX_IDLE_SECONDS:
+                self.close()
+            with self.guard:
+                if delay is None and self.client is None and not self.wake_event.is_set():
+                    self.thread = None
+                    return
+            timeout = OUTBOX_IDLE_SECONDS if delay is None else min(delay, OUTBOX_IDLE_SECONDS)
+            self.wake_event.wait(max(timeout, 0.1))
+
+    def drain(self):
+        """Send every due message; return seconds until the next retry, or None if nothing waits"""
+        next_due = None
+        with locked(SENDER_LOCK_PATH):
+            for message in list_messages():
+                if message["status"] != "queued":
+                    continue
+                wait = message["next_attempt"] - time.time()
+                if wait > 0:
+                    next_due = wait if next_due is None else min(next_due, wait)
+                    continue
+                self._deliver(message)
+                if message["status"] == "queued":
+                    wait = message["next_attempt"] - time.time()
+                    next_due = wait if next_due is None else min(next_due, wait)
+            _prune_sent()
+        return next_due
+
+    def _send(self, message):
+        config = read_json(EMAIL_CONFIG_PATH)
+        if not config:
+            raise RuntimeError("no email config; run the email setup first")
+        if self.client is None:
+            self.client = smtp_client(config)
+            self.client.login()
+        recipients, msg = self.client.prepare_send(message["to"], message["subject"], _open_body(message))
+        try:
+            self.client.smtp.sendmail(self.client.user, recipients, msg)
+        except smtplib.SMTPServerDisconnected:
+            # The server dropped an idle connection: reconnect once and resend
+            self.client.login()
+            self.client.smtp.sendmail(self.client.user, recipients, msg)
+        self.last_used = time.monotonic()
+
+    def _deliver(self, message):
+        try:
+            self._send(message)
+            # The report is journal text; once delivered there is no reason to keep it on disk
+            message.update(status="sent", sent_at=time.time(), last_error=None, body=None)
+        except Exception as e:
+            # Drop the connection; the next attempt starts a fresh one
+            self.close()
+            message["attempts"] += 1
+            message["last_error"] = f"{type(e).__name__}: {e}"
+            if message["attempts"] >= OUTBOX_MAX_ATTEMPTS:
+                message["status"] = "failed"
+            else:
+                message["next_attempt"] = time.time() + OUTBOX_RETRY_SECONDS * 2 ** (message["attempts"] - 1)
+        write_json(_message_path(message["id"]), message)
+
+    def close(self):
+        if self.client is not None:
+            try:
+                self.client.close()
+            except Exception:
+                pass
+            self.client = None
+
+
+_sender = None
+
+
+def get_outbox_sender():
+    """The process-wide outbox sender"""
+    global _sender
+    if _sender is None:
+        _sender = OutboxSender()
+    return _sender
+
+
+def _prune_sent():
+    sent = [m for m in list_messages() if m["status"] == "sent"]
+    for message in sent[:-OUTBOX_KEEP_SENT]:
+        os.remove(_message_path(message["id"]))
+
+
+def resume_outbox():
+    """Start delivering messages left queued by an earlier run; returns how many are waiting"""
+    pending = sum(1 for m in list_messages() if m["status"] == "queued")
+    if pending:
+        get_outbox_sender().wake()
+    return pending
+
+
+def retry_failed():
+    """Put failed messages back in the queue with a fresh set of attempts"""
+    count = 0
+    for message in list_messages():
+        if message["status"] == "failed":
+            message.update(status="queued", attempts=0, next_attempt=time.time())
+            write_json(_message_path(message["id"]), message)
+            count += 1
+    if count:
+        get_outbox_sender().wake()
+    return count
+
+
+def _format_time(timestamp):
+    return datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M") if timestamp else "-"
+
+
+def show_outbox():
+    """Table of queued, failed and recently sent messages"""
+    messages = list_messages()
+    if not messages:
+        console.print("[yellow]The outbox is empty.[/yellow]")
+        return
+    table = Table(title="Email Outbox", box=box.ROUNDED)
+    table.add_column("Queued", style="cyan")
+    table.add_column("Subject")
+    table.add_column("To", style="dim")
+    table.add_column("Status")
+    table.add_column("Attempts", justify="right")
+    table.add_column("Details", style="dim")
+    styles = {"queued": "yellow", "sent": "green", "failed": "red"}
+    for m in messages:
+        if m["status"] == "sent":
+            details = f"sent {_format_time(m['sent_at'])}"
+        elif m["status"] == "queued" and m["attempts"]:
+            details = f"retry at {_format_time(m['next_attempt'])}: {m['last_error']}"
+        else:
+            details = m["last_error"] or ""
+        style = styles.get(m["status"], "white")
+        table.add_row(_format_time(m["created"]), m["subject"], str(m["to"]),
+                      f"[{style}]{m['status']}[/{style}]", str(m["attempts"]), details)
+    console.print(table)
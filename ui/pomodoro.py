@@ -10,61 +10,102 @@ import json
 import time
 import threading
 import signal
+import uuid
+from ui.storage import write_json, write_text, appending, locked
 console = Console()
 DEFAULT_WORK_MINUTES = 25
 DEFAULT_SHORT_BREAK_MINUTES = 5
 DEFAULT_LONG_BREAK_MINUTES = 15
 DEFAULT_POMODOROS_BEFORE_LONG_BREAK = 4
 POMODORO_DATA_PATH = os.path.expanduser("~/.standlog/pomodoro_data.json")
+POMODORO_LOG_PATH = os.path.expanduser("~/.standlog/pomodoro_sessions.jsonl")
+POMODORO_COMPACT_BYTES = 256 * 1024
 timer_running = False
 timer_thread = None
 timer_stop_event = threading.Event()
 
+def read_pomodoro_log(offset=0):
+    """Read sessions appended to the log after a byte offset.
+
+    Returns (sessions, end_offset); a partially written last line is left for later.
+    """
+    if not os.path.exists(POMODORO_LOG_PATH):
+        return [], 0
+    sessions = []
+    with open(POMODORO_LOG_PATH, 'rb') as f:
+        f.seek(offset)
+        chunk = f.read()
+    complete = chunk[:chunk.rfind(b"\n") + 1]
+    for line in complete.splitlines():
+        try:
+            sessions.append(json.loads(line))
+        except Exception:
+            continue
+    return sessions, offset + len(complete)
+
 def load_pomodoro_data():
-    """Load Pomodoro data from file"""
-    if not os.path.exists(POMODORO_DATA_PATH):
-        return {}
-    try:
-        with open(POMODORO_DATA_PATH, 'r') as f:
-            return json.load(f)
-    except Exception as e:
-        console.print(f"[yellow]Error loading Pomodoro data: {e}[/yellow]")
-        return {}
+    """Load Pomodoro data: the compacted snapshot plus sessions appended since"""
+    data = {}
+    if os.path.exists(POMODORO_DATA_PATH):
+        try:
+            with open(POMODORO_DATA_PATH, 'r') as f:
+                data = json.load(f)
+        except Exception as e:
+            console.print(f"[yellow]Error loading Pomodoro data: {e}[/yellow]")
+    sessions, _ = read_pomodoro_log()
+    # A compaction interrupted before truncating the log may replay sessions already in the snapshot
+    seen = {s["id"] for day in data.values() for s in day if "id" in s}
+    for session in sessions:
+        if session.get("id") in seen:
+            continue
+        if "id" in session:
+            seen.add(session["id"])
+        data.setdefault(session.pop("date"), []).append(session)
+    return data
 
 def save_pomodoro_data(data):
     """Save Pomodoro data to file"""
-    os.makedirs(os.path.dirname(POMODORO_DATA_PATH), exist_ok=True)
     try:
-        with open(POMODORO_DATA_PATH, 'w') as f:
-            json.dump(data, f, indent=2)
+        write_json(POMODORO_DATA_PATH, data)
     except Exception as e:
         console.print(f"[red]Error saving Pomodoro data: {e}[/red]")
 
+def compact_pomodoro_log():
+    """Fold the session log into pomodoro_data.json and start a fresh log.
+
+    Write errors propagate, and the log is only emptied once the snapshot is on disk.
+    """
+    with locked(POMODORO_LOG_PATH):
+        write_json(POMODORO_DATA_PATH, load_pomodoro_data())
+        write_text(POMODORO_LOG_PATH, "")
+
 def log_completed_pomodoro(duration_minutes, task_description):
     """Log a completed Pomodoro session"""
-    data = load_pomodoro_data()
     today = datetime.now().strftime("%Y-%m-%d")
-    
-    if today not in data:
-        data[today] = []
-    
-    data[today].append({
+    session = {
+        "id": uuid.uuid4().hex,
+        "date": today,
         "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
         "duration_minutes": duration_minutes,
         "task": task_description
-    })
-    
-    save_pomodoro_data(data)
-    from main import DATA_DIR, get_today_path
+    }
+    with appending(POMODORO_LOG_PATH) as f:
+        f.write(json.dumps(session) + "\n")
+    if os.path.getsize(POMODORO_LOG_PATH) > POMODORO_COMPACT_BYTES:
+        try:
+            compact_pomodoro_log()
+        except Exception as e:
+            console.print(f"[yellow]Could not compact the Pomodoro log, keeping it as is: {e}[/yellow]")
+    from main import get_today_path
+    from ui.viewer import load_entry, save_entry
     today_path = get_today_path()
     if os.path.exists(today_path):
         try:
-            with open(today_path, 'r') as f:
-                entry = json.load(f)
-            entry['pomodoro_count'] = entry.get('pomodoro_count', 0) + 1
-            
-            with open(today_path, 'w') as f:
-                json.dump(entry, f, indent=2)
+            # Runs on the timer thread: hold the lock so a save from the menu can't interleave
+            with locked(today_path):
+                entry = load_entry(os.path.basename(today_path))
+                entry['pomodoro_count'] = entry.get('pomodoro_count', 0) + 1
+                save_entry(os.path.basename(today_path), entry)
         except Exception as e:
             console.print(f"[yellow]Error updating today's log with Pomodoro data: {e}[/yellow]")
 
@@ -177,38 +218,33 @@ def start_pomodoro_session():
 
 def show_pomodoro_stats():
     """Show Pomodoro statistics"""
-    data = load_pomodoro_data()
+    from ui.metrics import load_metrics, date_labels
+    import numpy as np
+    metrics = load_metrics()
+    active = np.flatnonzero(metrics["pomodoro_sessions"]) if metrics else []
     
-    if not data:
+    if not len(active):
         console.print("[yellow]No Pomodoro data available yet.[/yellow]")
         return
-    daily_stats = {}
-    for date, sessions in data.items():
-        total_minutes = sum(session["duration_minutes"] for session in sessions)
-        daily_stats[date] = {
-            "count": len(sessions),
-            "total_minutes": total_minutes
-        }
     table = Table(title="Recent Pomodoro Stats", box=box.ROUNDED)
     table.add_column("Date", style="cyan")
     table.add_column("Pomodoros", style="magenta")
     table.add_column("Total Time", style="green")
-    sorted_dates = sorted(daily_stats.keys(), reverse=True)
-    for date in sorted_dates[:7]:
-        stats = daily_stats[date]
-        hours, minutes = divmod(stats["total_minutes"], 60)
+    recent = active[::-1][:7]
+    recent_counts = metrics["pomodoro_sessions"][recent].tolist()
+    for date, count, total_minutes in zip(date_labels(metrics, recent), recent_counts, metrics["pomodoro_minutes"][recent].tolist()):
+        hours, minutes = divmod(total_minutes, 60)
         time_str = f"{hours}h {minutes}m" if hours else f"{minutes}m"
-        table.add_row(date, str(stats["count"]), time_str)
+        table.add_row(date, str(count), time_str)
     console.print(table)
-    total_pomodoros = sum(stats["count"] for stats in daily_stats.values())
-    total_minutes = sum(stats["total_minutes"] for stats in daily_stats.values())
+    total_pomodoros = int(metrics["pomodoro_sessions"].sum())
+    total_minutes = int(metrics["pomodoro_minutes"].sum())
     hours, minutes = divmod(total_minutes, 60)
     
     console.print(f"\n[bold]Total Pomodoros:[/bold] {total_pomodoros}")
     console.print(f"[bold]Total Focus Time:[/bold] {hours}h {minutes}m")
-    if len(sorted_dates) >= 3:
+    if len(active) >= 3:
         console.print("\n[bold]Productivity Pattern:[/bold]")
-        recent_counts = [daily_stats[date]["count"] for date in sorted_dates[:7]]
         avg_count = sum(recent_counts) / len(recent_counts)
         if avg_count > 6:
             console.print("[green]Excellent productivity! Keep up the great work![/green]")
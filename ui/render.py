@@ -0,0 +1,136 @@
+import os
+from contextlib import closing
+
+# Output formats: Markdown export, the weekly email report, and Rich markup for panels
+RENDER_FORMATS = ("md", "email", "rich")
+# Bump when a format changes so cached fragments are re-rendered
+RENDER_VERSION = 1
+RENDER_BATCH_SIZE = 256
+
+# One cached fragment per entry and format; a fragment is reused while the
+# entry file's mtime and size still match, the same signature refresh_index uses.
+# render_cache is the older table keyed by content hash; it is dropped.
+RENDER_SCHEMA = """
+DROP TABLE IF EXISTS render_cache;
+CREATE TABLE IF NOT EXISTS render_fragments (
+    filename TEXT NOT NULL,
+    format TEXT NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    fragment TEXT NOT NULL,
+    PRIMARY KEY (filename, format)
+) WITHOUT ROWID;
+"""
+
+
+def _tags(entry):
+    return ', '.join(entry.get('tags') or []) or '-'
+
+
+def _mood_text(entry):
+    from ui.mood import MOOD_EMOJIS
+    return MOOD_EMOJIS.get(entry.get('mood'), "Unknown")
+
+
+def render_entry(fname, entry, fmt):
+    """Format one entry; no caching"""
+    date = fname.replace('.json', '')
+    if fmt == "md":
+        time_info = f"\n- **Time spent:** {entry.get('time_spent', 0)} minutes" if entry.get('time_spent', 0) > 0 else ""
+        pomodoro_info = f"\n- **Pomodoros completed:** {entry.get('pomodoro_count', 0)}" if entry.get('pomodoro_count', 0) > 0 else ""
+        mood_info = f"\n- **Mood:** {_mood_text(entry)}" if entry.get('mood') else ""
+        return f"## {date}\n- **Did:** {entry.get('did', '')}\n- **Will do:** {entry.get('will_do', '')}\n- **Blockers:** {entry.get('blockers', '')}\n- **Tags:** {_tags(entry)}{time_info}{pomodoro_info}{mood_info}\n\n"
+    if fmt == "email":
+        return f"## {date}\n- **Did:** {entry.get('did', '')}\n- **Will do:** {entry.get('will_do', '')}\n- **Blockers:** {entry.get('blockers', '')}\n- **Tags:** {_tags(entry)}\n- **Notes:** {entry.get('notes', '-')}\n\n"
+    if fmt == "rich":
+        from rich.markup import escape
+        pomodoro_info = f"\n[b]Pomodoros completed:[/b] {entry.get('pomodoro_count', 0)}" if entry.get('pomodoro_count', 0) > 0 else ""
+        mood_info = ""
+        if entry.get('mood'):
+            from ui.mood import MOOD_COLORS
+            mood_color = MOOD_COLORS.get(entry.get('mood'), "white")
+            mood_info = f"\n[b]Mood:[/b] [{mood_color}]{_mood_text(entry)}[/{mood_color}]"
+        return (f"[b]What I did:[/b] {escape(entry.get('did', ''))}\n[b]What I'll do:[/b] {escape(entry.get('will_do', ''))}\n"
+                f"[b]Blockers:[/b] {escape(entry.get('blockers', ''))}\n[b]Tags:[/b] {escape(_tags(entry))}\n"
+                f"[b]Notes:[/b] {escape(entry.get('notes', '-') or '')}\n[b]Time spent:[/b] {entry.get('time_spent', 0)} min"
+                f"{pomodoro_info}{mood_info}\n[b]Date:[/b] {entry.get('date', date)}")
+    raise ValueError(f"Unknown render format: {fmt}")
+
+
+def _signature(fname):
+    from ui.index import DATA_DIR
+    try:
+        stat = os.stat(os.path.join(DATA_DIR, fname))
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _render_batch(conn, filenames, fmt, key):
+    from ui.viewer import load_entry
+    placeholders = ",".join("?" * len(filenames))
+    cached = {row[0]: ((row[1], row[2]), row[3]) for row in conn.execute(
+        f"SELECT filename, mtime_ns, size, fragment FROM render_fragments WHERE format = ? AND filename IN ({placeholders})",
+        [key, *filenames])}
+    fragments = {}
+    stale = []
+    for fname in filenames:
+        signature = _signature(fname)
+        if signature is None:
+            continue
+        hit = cached.get(fname)
+        if hit and hit[0] == signature:
+            fragments[fname] = hit[1]
+            continue
+        entry = load_entry(fname)
+        if isinstance(entry, dict):
+            fragments[fname] = render_entry(fname, entry, fmt)
+            stale.append((fname, key, *signature, fragments[fname]))
+    if stale:
+        with conn:
+            conn.executemany("INSERT OR REPLACE INTO render_fragments VALUES (?, ?, ?, ?, ?)", stale)
+    return fragments
+
+
+def render_entries(filenames, fmt):
+    """Yield (filename, fragment) in order, re-rendering only entries whose file changed.
+
+    Fragments are plaintext, so nothing is cached on disk while encryption is enabled.
+    Unreadable entries are skipped.
+    """
+    from ui.viewer import get_fernet, iter_entries
+    if fmt not in RENDER_FORMATS:
+        raise ValueError(f"Unknown render format: {fmt}")
+    if get_fernet():
+        for fname, entry in iter_entries(list(filenames)):
+            if isinstance(entry, dict):
+                yield fname, render_entry(fname, entry, fmt)
+        return
+    from ui.index import connect
+    key = f"{fmt}:{RENDER_VERSION}"
+    filenames = list(filenames)
+    with closing(connect()) as conn:
+        for i in range(0, len(filenames), RENDER_BATCH_SIZE):
+            batch = filenames[i:i + RENDER_BATCH_SIZE]
+            fragments = _render_batch(conn, batch, fmt, key)
+            for fname in batch:
+                if fname in fragments:
+                    yield fname, fragments[fname]
+
+
+def render_file(fname, fmt, entry=None):
+    """Fragment for a single entry, or None if it can't be read"""
+    if entry is not None:
+        from ui.viewer import get_fernet
+        if get_fernet():
+            return render_entry(fname, entry, fmt)
+    for _, fragment in render_entries([fname], fmt):
+        return fragment
+    return None
+
+
+def clear_render_cache():
+    """Drop every cached fragment (e.g. before plaintext must stop living on disk)"""
+    from ui.index import connect
+    with closing(connect()) as conn, conn:
+        conn.execute("DELETE FROM render_fragments")
@@ -0,0 +1,183 @@
+import re
+import hmac
+import json
+import math
+import hashlib
+from collections import defaultdict
+from contextlib import closing
+
+TOKEN_RE = re.compile(r"\w+")
+QUERY_RE = re.compile(r'"([^"]*)"|(\S+)')
+INDEXED_FIELDS = ["did", "will_do", "blockers", "notes", "voice_transcript"]
+# Positions of each field start this far apart so phrases never span two fields
+FIELD_GAP = 100000
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# While encryption is on, postings hold HMACs of the terms and no positions, so the
+# index can't be read back into entry text. Prefix queries can't match then, and a
+# phrase matches entries containing all of its words.
+SEARCH_SCHEMA = """
+CREATE TABLE IF NOT EXISTS postings (
+    term TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    tf INTEGER NOT NULL,
+    positions TEXT NOT NULL,
+    PRIMARY KEY (term, filename)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS postings_filename ON postings(filename);
+CREATE TABLE IF NOT EXISTS documents (
+    filename TEXT PRIMARY KEY,
+    length INTEGER NOT NULL
+);
+"""
+
+
+def tokenize(text):
+    """Split text into lowercase word tokens"""
+    return TOKEN_RE.findall((text or "").lower())
+
+
+def _term_key():
+    from ui.viewer import get_index_key
+    return get_index_key()
+
+
+def hash_term(key, term):
+    return hmac.new(key, term.encode(), hashlib.sha256).hexdigest()
+
+
+def remove_postings(conn, filename):
+    """Drop every posting for an entry"""
+    conn.execute("DELETE FROM postings WHERE filename = ?", (filename,))
+    conn.execute("DELETE FROM documents WHERE filename = ?", (filename,))
+
+
+def update_postings(conn, filename, entry):
+    """Re-index the searchable text of a single entry"""
+    remove_postings(conn, filename)
+    positions = defaultdict(list)
+    length = 0
+    for field_idx, field in enumerate(INDEXED_FIELDS):
+        tokens = tokenize(entry.get(field, ""))
+        for pos, token in enumerate(tokens):
+            positions[token].append(field_idx * FIELD_GAP + pos)
+        length += len(tokens)
+    key = _term_key()
+    if key:
+        rows = [(hash_term(key, term), filename, len(pos), "[]") for term, pos in positions.items()]
+    else:
+        rows = [(term, filename, len(pos), json.dumps(pos)) for term, pos in positions.items()]
+    conn.executemany("INSERT INTO postings VALUES (?, ?, ?, ?)", rows)
+    conn.execute("INSERT INTO documents VALUES (?, ?)", (filename, length))
+
+
+def parse_query(query):
+    """Turn a query string into term, prefix and phrase clauses"""
+    clauses = []
+    for phrase, word in QUERY_RE.findall(query):
+        if phrase:
+            tokens = tokenize(phrase)
+            if len(tokens) > 1:
+                clauses.append(("phrase", tokens))
+            elif tokens:
+                clauses.append(("term", tokens[0]))
+        elif word.endswith("*") and tokenize(word):
+            clauses.append(("prefix", tokenize(word)[0]))
+        else:
+            clauses.extend(("term", token) for token in tokenize(word))
+    return clauses
+
+
+def _clause_matches(conn, kind, value):
+    """Return {filename: (term frequency, document length)} for documents matching one clause"""
+    if kind == "term":
+        rows = conn.execute(
+            "SELECT filename, tf, length FROM postings JOIN documents USING (filename) WHERE term = ?",
+            (value,),
+        )
+        return {row[0]: (row[1], row[2]) for row in rows}
+    if kind == "prefix":
+        rows = conn.execute(
+            "SELECT filename, SUM(tf), length FROM postings JOIN documents USING (filename) "
+            "WHERE term >= ? AND term < ? GROUP BY filename",
+            (value, value + "\uffff"),
+        )
+        return {row[0]: (row[1], row[2]) for row in rows}
+    candidates = None
+    term_positions = []
+    for term in value:
+        rows = conn.execute(
+            "SELECT filename, positions, length FROM postings JOIN documents USING (filename) WHERE term = ?",
+            (term,),
+        ).fetchall()
+        found = {row[0]: (row[1], row[2]) for row in rows}
+        candidates = set(found) if candidates is None else candidates & set(found)
+        term_positions.append(found)
+        if not candidates:
+            return {}
+    matches = {}
+    for filename in candidates:
+        positions, length = term_positions[0][filename]
+        starts = set(json.loads(positions))
+        for offset, found in enumerate(term_positions[1:], 1):
+            starts &= {pos - offset for pos in json.loads(found[filename][0])}
+            if not starts:
+                break
+        if starts:
+            matches[filename] = (len(starts), length)
+    return matches
+
+
+def _hashed_clause_matches(conn, key, kind, value):
+    """_clause_matches against HMAC'd postings"""
+    if kind == "prefix":
+        return {}
+    matches = None
+    for term in [value] if kind == "term" else value:
+        found = _clause_matches(conn, "term", hash_term(key, term))
+        if matches is None:
+            matches = found
+        else:
+            matches = {f: (min(tf, found[f][0]), length) for f, (tf, length) in matches.items() if f in found}
+    return matches
+
+
+def search(query, limit=None):
+    """Return (filename, score) pairs matching every clause of the query, best first.
+
+    Only the index is consulted; writers keep it current through index_entry and
+    refresh_index picks up files edited outside StandLog.
+    """
+    from ui.index import connect
+    clauses = parse_query(query)
+    if not clauses:
+        return []
+    key = _term_key()
+    with closing(connect()) as conn:
+        doc_count, total_length = conn.execute("SELECT COUNT(*), SUM(length) FROM documents").fetchone()
+        if not doc_count:
+            return []
+        avg_length = (total_length or 0) / doc_count or 1
+        scores = None
+        for kind, value in clauses:
+            if key:
+                matches = _hashed_clause_matches(conn, key, kind, value)
+            else:
+                matches = _clause_matches(conn, kind, value)
+            df = len(matches)
+            if scores is not None:
+                matches = {f: tf for f, tf in matches.items() if f in scores}
+            if not matches:
+                return []
+            idf = math.log(1 + (doc_count - df + 0.5) / (df + 0.5))
+            clause_scores = {}
+            for filename, (tf, length) in matches.items():
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * length / avg_length)
+                clause_scores[filename] = idf * tf * (BM25_K1 + 1) / (tf + norm)
+            if scores is None:
+                scores = clause_scores
+            else:
+                scores = {f: scores[f] + clause_scores[f] for f in clause_scores}
+    ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+    return ranked[:limit] if limit else ranked
@@ -0,0 +1,162 @@
+import os
+import json
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+LOCK_FILENAME = ".lock"
+# The umask can only be read by setting it, so do it once at import, before any writer thread runs
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+_locks = {}
+_locks_guard = threading.Lock()
+_local = threading.local()
+
+
+def _lock_path(path):
+    return os.path.join(os.path.dirname(os.path.abspath(path)), LOCK_FILENAME)
+
+
+@contextmanager
+def locked(path):
+    """Hold the lock for `path` across threads and processes.
+
+    Files in one directory share a lock. It is re-entrant within a thread, so a
+    locked read-modify-write can call the write helpers below.
+    """
+    lock_path = _lock_path(path)
+    with _locks_guard:
+        entry = _locks.setdefault(lock_path, [threading.RLock(), None, 0])
+    with entry[0]:
+        if entry[2] == 0:
+            os.makedirs(os.path.dirname(lock_path), exist_ok=True)
+            f = open(lock_path, "a+b")
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            entry[1] = f
+        entry[2] += 1
+        try:
+            yield
+        finally:
+            entry[2] -= 1
+            if entry[2] == 0:
+                f = entry[1]
+                if fcntl:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+                else:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+                f.close()
+                entry[1] = None
+
+
+def _fsync_dir(directory):
+    if fcntl is None:
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _commit(path, data):
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    import tempfile
+    with locked(path):
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            # mkstemp creates 0600 files: keep the target's mode, or what open() would give a new file
+            try:
+                mode = os.stat(path).st_mode & 0o7777
+            except FileNotFoundError:
+                mode = 0o666 & ~_UMASK
+            os.chmod(tmp_path, mode)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        _fsync_dir(directory)
+
+
+def _pending():
+    return getattr(_local, "pending", None)
+
+
+@contextmanager
+def batch():
+    """Coalesce writes made inside the block: each file is written and fsynced once, on exit.
+
+    Reads through read_bytes/read_json see the pending data. Nested batches join the
+    outermost one. Nothing is written if the block raises.
+    """
+    if _pending() is not None:
+        yield
+        return
+    _local.pending = {}
+    try:
+        yield
+        pending = _local.pending
+    finally:
+        _local.pending = None
+    for path, data in pending.items():
+        _commit(path, data)
+
+
+def write_bytes(path, data):
+    """Atomically replace `path` with `data` (temp file, fsync, rename)"""
+    pending = _pending()
+    if pending is not None:
+        pending[os.path.abspath(path)] = data
+    else:
+        _commit(path, data)
+
+
+def write_text(path, text):
+    write_bytes(path, text.encode("utf-8"))
+
+
+def write_json(path, obj, indent=2):
+    write_text(path, json.dumps(obj, indent=indent))
+
+
+def read_bytes(path):
+    """Read `path`, preferring data still pending in the current batch"""
+    pending = _pending()
+    if pending is not None and os.path.abspath(path) in pending:
+        return pending[os.path.abspath(path)]
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def read_json(path, default=None):
+    """Load JSON from `path`, or return `default` if the file does not exist"""
+    pending = _pending()
+    if not os.path.exists(path) and (pending is None or os.path.abspath(path) not in pending):
+        return default
+    return json.loads(read_bytes(path).decode("utf-8"))
+
+
+@contextmanager
+def appending(path):
+    """Open `path` for appending under its lock and fsync the new lines on close"""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with locked(path), open(path, "a") as f:
+        yield f
+        f.flush()
+        os.fsync(f.fileno())
@@ -0,0 +1,128 @@
+from datetime import datetime, timedelta
+from contextlib import closing
+
+STREAKS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS aggregate_days (
+    date TEXT PRIMARY KEY,
+    count INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS aggregate_months (
+    month TEXT PRIMARY KEY,
+    count INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS aggregate_state (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    current_streak INTEGER NOT NULL,
+    longest_streak INTEGER NOT NULL,
+    last_date TEXT
+);
+INSERT OR IGNORE INTO aggregate_state VALUES (0, 0, 0, NULL);
+"""
+
+
+def _state(conn):
+    row = conn.execute("SELECT current_streak, longest_streak, last_date FROM aggregate_state WHERE id = 0").fetchone()
+    return {"current": row[0], "longest": row[1], "last_date": row[2]}
+
+
+def _is_day(date):
+    try:
+        datetime.strptime(date, "%Y-%m-%d")
+    except (ValueError, TypeError):
+        return False
+    return True
+
+
+def _add_day(conn, date, state):
+    conn.execute("INSERT INTO aggregate_days VALUES (?, 1)", (date,))
+    conn.execute(
+        "INSERT INTO aggregate_months VALUES (?, 1) ON CONFLICT(month) DO UPDATE SET count = count + 1",
+        (date[:7],),
+    )
+    last = state["last_date"]
+    if last and (datetime.strptime(date, "%Y-%m-%d") - datetime.strptime(last, "%Y-%m-%d")).days == 1:
+        state["current"] += 1
+    else:
+        state["current"] = 1
+    state["longest"] = max(state["longest"], state["current"])
+    state["last_date"] = date
+
+
+def _save_state(conn, state):
+    conn.execute(
+        "UPDATE aggregate_state SET current_streak = ?, longest_streak = ?, last_date = ? WHERE id = 0",
+        (state["current"], state["longest"], state["last_date"]),
+    )
+
+
+def rebuild_aggregates(conn):
+    """Recompute every aggregate from the dates in the entry index"""
+    conn.execute("DELETE FROM aggregate_days")
+    conn.execute("DELETE FROM aggregate_months")
+    state = {"current": 0, "longest": 0, "last_date": None}
+    for (date,) in conn.execute("SELECT date FROM entries ORDER BY date").fetchall():
+        # Names like 2024-02-30 pass ENTRY_FILE_RE but aren't days; leave them out
+        if _is_day(date):
+            _add_day(conn, date, state)
+    _save_state(conn, state)
+
+
+def check_aggregates(conn):
+    """Rebuild if the aggregates drifted from the index, e.g. after entries were deleted"""
+    days = conn.execute("SELECT COUNT(*) FROM aggregate_days").fetchone()[0]
+    entries = conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+    if days != entries:
+        dates = conn.execute("SELECT date FROM entries").fetchall()
+        if days != sum(1 for (date,) in dates if _is_day(date)):
+            rebuild_aggregates(conn)
+
+
+def record_days(conn, dates):
+    """Fold newly written entry dates into the aggregates.
+
+    Dates that are already counted are skipped. Appending the newest day is
+    O(1); a back-filled day falls back to a rebuild.
+    """
+    state = _state(conn)
+    for date in sorted(dates):
+        if not _is_day(date):
+            continue
+        if conn.execute("SELECT 1 FROM aggregate_days WHERE date = ?", (date,)).fetchone():
+            continue
+        if state["last_date"] and date < state["last_date"]:
+            rebuild_aggregates(conn)
+            return
+        _add_day(conn, date, state)
+    _save_state(conn, state)
+
+
+def get_streaks():
+    """Return the current streak, longest streak and last logged date"""
+    from ui.index import connect, refresh_index
+    refresh_index()
+    with closing(connect()) as conn:
+        return _state(conn)
+
+
+def get_current_streak():
+    """Current streak, or 0 if neither today nor yesterday was logged"""
+    streaks = get_streaks()
+    today = datetime.now()
+    if streaks["last_date"] not in (today.strftime("%Y-%m-%d"), (today - timedelta(days=1)).strftime("%Y-%m-%d")):
+        return 0
+    return streaks["current"]
+
+
+def get_aggregates(year=None):
+    """Return the streaks plus per-day counts (for one year, or all time) and per-month counts"""
+    from ui.index import connect, refresh_index
+    refresh_index()
+    with closing(connect()) as conn:
+        aggregates = _state(conn)
+        if year is None:
+            rows = conn.execute("SELECT date, count FROM aggregate_days")
+        else:
+            rows = conn.execute("SELECT date, count FROM aggregate_days WHERE date LIKE ?", (f"{year}-%",))
+        aggregates["days"] = dict(rows.fetchall())
+        aggregates["months"] = dict(conn.execute("SELECT month, count FROM aggregate_months").fetchall())
+    return aggregates
@@ -1,38 +1,39 @@
 from rich.console import Console
-from rich.table import Table
 from rich.panel import Panel
 from rich.prompt import Prompt
 from rich import box
 from datetime import datetime
 import os
 import json
-from cryptography.fernet import Fernet, InvalidToken
 import base64
+import hashlib
 import getpass
-import subprocess
 import glob
 from datetime import timedelta
-try:
-    import ics
-except ImportError:
-    ics = None
-import platform
-import shutil
+import time
+from ui.index import get_indexed_entries, index_entry, reset_text_index, ENTRY_FILE_RE
+from ui.streaks import get_aggregates
+from ui.storage import write_bytes, write_json, read_json, locked
 
 BADGES_PATH = os.path.expanduser("~/.standlog/badges.json")
 DATA_DIR = os.path.expanduser("~/.standlog/entries")
 ENCRYPTION_KEY_PATH = os.path.expanduser("~/.standlog/.key")
+DECRYPT_BATCH_SIZE = 64
+EXPORT_BUFFER_SIZE = 1 << 16
+# Reminder context probes: each gets this long, and results are reused until the inputs change
+REMINDER_PROBE_TIMEOUT = 2
+REMINDER_CACHE_TTL = 300
 console = Console()
+_fernet = None
+_fernet_loaded = False
+_index_key = None
+_reminder_cache = {"key": None, "expires": 0.0, "messages": []}
 
 def load_badges():
-    if not os.path.exists(BADGES_PATH):
-        return {}
-    with open(BADGES_PATH) as f:
-        return json.load(f)
+    return read_json(BADGES_PATH, {})
 
 def save_badges(badges):
-    with open(BADGES_PATH, "w") as f:
-        json.dump(badges, f, indent=2)
+    write_json(BADGES_PATH, badges)
 
 def award_badge(badge):
     badges = load_badges()
@@ -51,28 +52,54 @@ def show_badges():
 def list_entry_files():
     if not os.path.exists(DATA_DIR):
         return []
-    return sorted([f for f in os.listdir(DATA_DIR) if f.endswith('.json')])
+    return sorted([f for f in os.listdir(DATA_DIR) if ENTRY_FILE_RE.match(f)])
 
 
 def get_fernet():
-    if not os.path.exists(ENCRYPTION_KEY_PATH):
-        return None
-    with open(ENCRYPTION_KEY_PATH, "rb") as f:
-        key = f.read()
-    return Fernet(key)
+    global _fernet, _fernet_loaded, _index_key
+    if not _fernet_loaded:
+        _fernet = None
+        _index_key = None
+        if os.path.exists(ENCRYPTION_KEY_PATH):
+            from cryptography.fernet import Fernet
+            with open(ENCRYPTION_KEY_PATH, "rb") as f:
+                key = f.read()
+            _fernet = Fernet(key)
+            _index_key = hashlib.sha256(b"standlog search index:" + key).digest()
+        _fernet_loaded = True
+    return _fernet
+
+
+def get_index_key():
+    """Key for hashing search terms while encryption is on, or None"""
+    get_fernet()
+    return _index_key
+
+
+def invalidate_fernet():
+    global _fernet, _fernet_loaded, _index_key
+    _fernet = None
+    _fernet_loaded = False
+    _index_key = None
 
 
 def set_encryption():
     passphrase = getpass.getpass("Set a passphrase for encryption: ")
     key = base64.urlsafe_b64encode(passphrase.encode().ljust(32, b'0'))
-    with open(ENCRYPTION_KEY_PATH, "wb") as f:
-        f.write(key)
+    write_bytes(ENCRYPTION_KEY_PATH, key)
+    invalidate_fernet()
+    reset_text_index()
+    # Cached fragments are plaintext
+    from ui.render import clear_render_cache
+    clear_render_cache()
     console.print("[green]Encryption enabled![/green]")
 
 
 def unset_encryption():
     if os.path.exists(ENCRYPTION_KEY_PATH):
         os.remove(ENCRYPTION_KEY_PATH)
+        invalidate_fernet()
+        reset_text_index()
         console.print("[yellow]Encryption disabled.[/yellow]")
     else:
         console.print("[yellow]Encryption was not enabled.[/yellow]")
@@ -89,6 +116,7 @@ def decrypt_data(data):
     f = get_fernet()
     if not f:
         return data.decode()
+    from cryptography.fernet import InvalidToken
     try:
         return f.decrypt(data).decode()
     except InvalidToken:
@@ -111,12 +139,48 @@ def load_entry(filename):
         return None
 
 
+def iter_entries(filenames, batch_size=DECRYPT_BATCH_SIZE, stats=None):
+    """Yield (filename, entry) in order, loading each batch of files in a thread pool.
+
+    If given, `stats` is filled with the entry count and elapsed seconds.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    start = time.perf_counter()
+    count = 0
+    with ThreadPoolExecutor() as pool:
+        for i in range(0, len(filenames), batch_size):
+            batch = filenames[i:i + batch_size]
+            for fname, entry in zip(batch, pool.map(load_entry, batch)):
+                count += 1
+                yield fname, entry
+    if stats is not None:
+        stats.update(count=count, seconds=time.perf_counter() - start)
+
+
+def print_decrypt_stats(count, seconds):
+    """Report decryption throughput (only while encryption is on)"""
+    if get_fernet() and count:
+        console.print(f"[dim]Decrypted {count} entries in {seconds:.2f}s ({count / max(seconds, 1e-9):.0f} entries/s)[/dim]")
+
+
+def fill_entry_text(rows, stats=None):
+    """Put did/blockers text back into index rows, which hold none while encryption is on"""
+    if not get_fernet():
+        return rows
+    entries = dict(iter_entries([row["filename"] for row in rows], stats=stats))
+    for row in rows:
+        entry = entries.get(row["filename"])
+        if isinstance(entry, dict):
+            row["did_preview"] = entry.get("did", "") or ""
+            row["blockers"] = entry.get("blockers", "") or ""
+    return rows
+
+
 def save_entry(filename, entry):
     path = os.path.join(DATA_DIR, filename)
     data = json.dumps(entry, indent=2)
-    enc = encrypt_data(data)
-    with open(path, "wb") as f:
-        f.write(enc)
+    write_bytes(path, encrypt_data(data))
+    index_entry(filename, entry)
 
 
 def feedback_path(entry_file):
@@ -128,19 +192,18 @@ def leave_feedback(entry_file):
     feedback = Prompt.ask("Enter your feedback (or encouragement)")
     user = Prompt.ask("Your name (optional)", default="Anonymous")
     fb_entry = {"user": user, "feedback": feedback, "time": datetime.now().strftime("%Y-%m-%d %H:%M")}
-    feedbacks = []
-    if os.path.exists(fb_path):
-        with open(fb_path, "rb") as f:
-            raw = f.read()
-        try:
-            feedbacks = json.loads(raw.decode())
-        except Exception:
-            text = decrypt_data(raw)
-            feedbacks = json.loads(text)
-    feedbacks.append(fb_entry)
-    enc = encrypt_data(json.dumps(feedbacks, indent=2))
-    with open(fb_path, "wb") as f:
-        f.write(enc)
+    with locked(fb_path):
+        feedbacks = []
+        if os.path.exists(fb_path):
+            with open(fb_path, "rb") as f:
+                raw = f.read()
+            try:
+                feedbacks = json.loads(raw.decode())
+            except Exception:
+                text = decrypt_data(raw)
+                feedbacks = json.loads(text)
+        feedbacks.append(fb_entry)
+        write_bytes(fb_path, encrypt_data(json.dumps(feedbacks, indent=2)))
     console.print("[green]Feedback added![/green]")
     award_badge("Feedback Given")
 
@@ -157,6 +220,7 @@ def view_feedback(entry_file):
     except Exception:
         text = decrypt_data(raw)
         feedbacks = json.loads(text)
+    from rich.table import Table
     table = Table(title=f"Feedback for {entry_file.replace('.json','')}", box=box.SIMPLE)
     table.add_column("User", style="cyan")
     table.add_column("Feedback", style="magenta")
@@ -168,20 +232,30 @@ def view_feedback(entry_file):
         award_badge("Feedback Received")
 
 
+def _weekly_streak():
+    """Consecutive days ending at the newest of the last seven logged days"""
+    streak = 0
+    prev_date = None
+    for date in sorted(get_aggregates()["days"])[-7:]:
+        d = datetime.strptime(date, "%Y-%m-%d")
+        streak = streak + 1 if prev_date and (d - prev_date).days == 1 else 1
+        prev_date = d
+    return streak
+
+
 def show_weekly_stats():
-    files = list_entry_files()
-    last_7 = files[-7:]
+    decrypt_stats = {}
+    last_7 = fill_entry_text(get_indexed_entries()[-7:], stats=decrypt_stats)
     if not last_7:
         console.print("[red]No logs found for the past week.[/red]")
         return
+    from rich.table import Table
     table = Table(title="Weekly StandLog Stats", box=box.ROUNDED)
     table.add_column("Date", style="cyan")
     table.add_column("Did", style="green")
     table.add_column("Blockers", style="red")
     table.add_column("Mood", style="magenta")
     blockers_count = {}
-    streak = 0
-    prev_date = None
     mood_data = []
     
     try:
@@ -190,11 +264,8 @@ def show_weekly_stats():
     except ImportError:
         has_mood_module = False
     
-    for fname in last_7:
-        entry = load_entry(fname)
-        if not entry:
-            continue
-        date = fname.replace('.json', '')
+    for entry in last_7:
+        date = entry['date']
         
         mood_display = "-"
         if has_mood_module and entry.get('mood'):
@@ -204,101 +275,181 @@ def show_weekly_stats():
             mood_display = f"[{mood_color}]{mood_text.split()[0]}[/{mood_color}]"  # Just show the emoji
             mood_data.append(int(mood) if mood.isdigit() else 3)  # Default to neutral if not a digit
         
-        table.add_row(date, entry['did'][:20], entry['blockers'][:20], mood_display)
+        table.add_row(date, entry['did_preview'][:20], entry['blockers'][:20], mood_display)
         if entry['blockers']:
             for word in entry['blockers'].split():
                 blockers_count[word] = blockers_count.get(word, 0) + 1
-        d = datetime.strptime(date, "%Y-%m-%d")
-        if prev_date is None or (d - prev_date).days == 1:
-            streak += 1
-        else:
-            streak = 1
-        prev_date = d
     console.print(table)
     if blockers_count:
         common = max(blockers_count, key=blockers_count.get)
         console.print(f"[bold yellow]Most common blocker:[/bold yellow] {common}")
-    console.print(f"[bold green]Logging streak:[/bold green] {streak} days")
+    console.print(f"[bold green]Logging streak:[/bold green] {_weekly_streak()} days")
     
     if mood_data:
         avg_mood = sum(mood_data) / len(mood_data)
         mood_trend = "↗️" if mood_data[-1] > avg_mood else "↘️" if mood_data[-1] < avg_mood else "→"
         console.print(f"[bold magenta]Average mood:[/bold magenta] {avg_mood:.1f} {mood_trend}")
+    if decrypt_stats:
+        print_decrypt_stats(decrypt_stats["count"], decrypt_stats["seconds"])
+
+
+def export_markdown_entry(fname, entry):
+    from ui.render import render_entry
+    return render_entry(fname, entry, "md")
 
 
 def export_logs(fmt="md"):
+    """Stream every entry to ~/.standlog/journal.{md,json,jsonl} one at a time"""
     files = list_entry_files()
     if not files:
         console.print("[red]No logs to export.[/red]")
         return
-    if fmt == "md":
-        out = "# StandLog Journal\n\n"
-        for fname in files:
-            entry = load_entry(fname)
-            if not entry:
-                continue
-            pomodoro_info = f"\n- **Pomodoros completed:** {entry.get('pomodoro_count', 0)}" if entry.get('pomodoro_count', 0) > 0 else ""
-            time_info = f"\n- **Time spent:** {entry.get('time_spent', 0)} minutes" if entry.get('time_spent', 0) > 0 else ""
-            
-            mood_info = ""
-            if entry.get('mood'):
-                try:
-                    from ui.mood import MOOD_EMOJIS
-                    mood = entry.get('mood')
-                    mood_text = MOOD_EMOJIS.get(mood, "Unknown")
-                    mood_info = f"\n- **Mood:** {mood_text}"
-                except ImportError:
-                    pass
-            
-            out += f"## {fname.replace('.json', '')}\n- **Did:** {entry['did']}\n- **Will do:** {entry['will_do']}\n- **Blockers:** {entry['blockers']}\n- **Tags:** {', '.join(entry['tags']) if entry['tags'] else '-'}{time_info}{pomodoro_info}{mood_info}\n\n"
-        md_path = os.path.expanduser("~/.standlog/journal.md")
-        os.makedirs(os.path.dirname(md_path), exist_ok=True)
-        with open(md_path, "w") as f:
-            f.write(out)
-        console.print(f"[green]Exported to {md_path}[/green]")
-    elif fmt == "json":
-        all_entries = [load_entry(f) for f in files if load_entry(f)]
-        json_path = os.path.expanduser("~/.standlog/journal.json")
-        os.makedirs(os.path.dirname(json_path), exist_ok=True)
-        with open(json_path, "w") as f:
-            json.dump(all_entries, f, indent=2)
-        console.print(f"[green]Exported to {json_path}[/green]")
+    extension = {"md": "md", "json": "json", "jsonl": "jsonl"}.get(fmt)
+    if extension is None:
+        console.print(f"[red]Unknown export format: {fmt}[/red]")
+        return
+    out_path = os.path.expanduser(f"~/.standlog/journal.{extension}")
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    count = 0
+    start = time.perf_counter()
+    with open(out_path, "w", buffering=EXPORT_BUFFER_SIZE) as f:
+        if fmt == "md":
+            # Markdown comes from the render cache; only changed entries are re-read and formatted
+            from ui.render import render_entries
+            f.write("# StandLog Journal\n\n")
+            for _, fragment in render_entries(files, "md"):
+                f.write(fragment)
+                count += 1
+        else:
+            if fmt == "json":
+                f.write("[")
+            for fname, entry in iter_entries(files):
+                if not isinstance(entry, dict):
+                    continue
+                if fmt == "json":
+                    f.write(",\n" if count else "\n")
+                    f.write("  " + json.dumps(entry, indent=2).replace("\n", "\n  "))
+                else:
+                    f.write(json.dumps(entry) + "\n")
+                count += 1
+            if fmt == "json":
+                f.write("\n]" if count else "]")
+    print_decrypt_stats(count, time.perf_counter() - start)
+    console.print(f"[green]Exported {count} entries to {out_path}[/green]")
 
 
-def reminder():
-    today = datetime.now().strftime("%Y-%m-%d")
-    today_path = os.path.join(DATA_DIR, f"{today}.json")
-    already_logged = os.path.exists(today_path)
-    context_msgs = []
-    ics_files = glob.glob(os.path.expanduser("~/*.ics"))
-    if ics is None:
-        context_msgs.append("[red]Install the 'ics' package for calendar-based reminders: pip install ics[/red]")
-    elif ics_files:
-        for ics_file in ics_files:
-            try:
-                with open(ics_file) as f:
-                    cal = ics.Calendar(f.read())
-                for event in cal.timeline.today():
-                    context_msgs.append(f"You had a calendar event today: {event.name}")
-            except Exception:
-                pass
-    if shutil.which("git"):
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _git_head_signature():
+    """HEAD plus the mtimes of the refs it can point to, so a new commit changes it"""
+    git_dir = os.path.expanduser("~/.git")
+    try:
+        with open(os.path.join(git_dir, "HEAD")) as f:
+            head = f.read().strip()
+    except OSError:
+        return None
+    refs = [os.path.join(git_dir, "HEAD"), os.path.join(git_dir, "packed-refs")]
+    if head.startswith("ref: "):
+        refs.append(os.path.join(git_dir, head[5:]))
+    return head, tuple(_mtime(p) for p in refs)
+
+
+def _calendar_probe(ics_files):
+    # ics is slow to import, so only load it when there is a calendar to read
+    try:
+        import ics
+    except ImportError:
+        return ["[red]Install the 'ics' package for calendar-based reminders: pip install ics[/red]"]
+    msgs = []
+    for ics_file in ics_files:
         try:
-            git_dir = os.path.expanduser("~")
-            result = subprocess.run([
-                "git", "--no-pager", "log", "--since=midnight", "--pretty=oneline"
-            ], cwd=git_dir, capture_output=True, text=True)
-            if result.returncode == 0 and result.stdout.strip():
-                context_msgs.append("You made git commits today!")
+            with open(ics_file) as f:
+                cal = ics.Calendar(f.read())
+            for event in cal.timeline.today():
+                msgs.append(f"You had a calendar event today: {event.name}")
         except Exception:
             pass
-    if shutil.which("uptime") and platform.system() != "Windows":
+    return msgs
+
+
+def _git_probe():
+    import shutil
+    import subprocess
+    if not shutil.which("git"):
+        return []
+    try:
+        result = subprocess.run([
+            "git", "--no-pager", "log", "--since=midnight", "--pretty=oneline"
+        ], cwd=os.path.expanduser("~"), capture_output=True, text=True, timeout=REMINDER_PROBE_TIMEOUT)
+        if result.returncode == 0 and result.stdout.strip():
+            return ["You made git commits today!"]
+    except Exception:
+        pass
+    return []
+
+
+def _uptime_probe():
+    import platform
+    import shutil
+    import subprocess
+    if not shutil.which("uptime") or platform.system() == "Windows":
+        return []
+    try:
+        uptime = subprocess.check_output(["uptime", "-p"], timeout=REMINDER_PROBE_TIMEOUT).decode()
+        if "hour" in uptime or "hours" in uptime:
+            return [f"You've been active for: {uptime.strip()}"]
+    except Exception:
+        pass
+    return []
+
+
+def get_context_messages():
+    """Calendar, git and uptime hints for the reminder.
+
+    The probes run concurrently and any still running after REMINDER_PROBE_TIMEOUT is
+    left out. Results are cached until the date, a calendar file or git HEAD changes,
+    or REMINDER_CACHE_TTL passes (uptime has no cheaper signal).
+    """
+    ics_files = sorted(glob.glob(os.path.expanduser("~/*.ics")))
+    key = (datetime.now().strftime("%Y-%m-%d"), tuple((p, _mtime(p)) for p in ics_files), _git_head_signature())
+    now = time.monotonic()
+    if _reminder_cache["key"] == key and now < _reminder_cache["expires"]:
+        return _reminder_cache["messages"]
+    probes = [(_git_probe,), (_uptime_probe,)]
+    if ics_files:
+        probes.insert(0, (_calendar_probe, ics_files))
+    import threading
+    results = [None] * len(probes)
+
+    def run(i, probe):
         try:
-            uptime = subprocess.check_output(["uptime", "-p"]).decode()
-            if "hour" in uptime or "hours" in uptime:
-                context_msgs.append(f"You've been active for: {uptime.strip()}")
+            results[i] = probe[0](*probe[1:])
         except Exception:
-            pass
+            results[i] = []
+
+    # Daemon threads, not a ThreadPoolExecutor: its workers are joined at interpreter
+    # exit, so a hung probe that was dropped would still keep StandLog from quitting
+    threads = [threading.Thread(target=run, args=(i, probe), daemon=True) for i, probe in enumerate(probes)]
+    for thread in threads:
+        thread.start()
+    deadline = time.monotonic() + REMINDER_PROBE_TIMEOUT
+    for thread in threads:
+        thread.join(max(deadline - time.monotonic(), 0))
+    messages = [msg for thread, result in zip(threads, results) if not thread.is_alive() and result for msg in result]
+    _reminder_cache.update(key=key, expires=now + REMINDER_CACHE_TTL, messages=messages)
+    return messages
+
+
+def reminder():
+    today = datetime.now().strftime("%Y-%m-%d")
+    today_path = os.path.join(DATA_DIR, f"{today}.json")
+    already_logged = os.path.exists(today_path)
+    context_msgs = get_context_messages()
     if not already_logged:
         if context_msgs:
             console.print("[bold blink yellow]Context-Aware Reminder:[/bold blink yellow]")
@@ -312,38 +463,21 @@ def reminder():
 
 
 def show_heatmap():
-    files = list_entry_files()
-    if not files:
+    year = datetime.now().year
+    aggregates = get_aggregates(year)
+    if not aggregates["last_date"]:
         console.print("[red]No logs to visualize.[/red]")
         return
-    from collections import defaultdict
     from rich.text import Text
     from rich.columns import Columns
-    from datetime import date as dtdate
     import calendar
-    year = datetime.now().year
-    log_days = defaultdict(int)
-    for fname in files:
-        date = fname.replace('.json', '')
-        log_days[date] += 1
-    all_dates = sorted(log_days.keys())
-    streak = 0
-    max_streak = 0
-    prev = None
-    for d in all_dates:
-        d_obj = datetime.strptime(d, "%Y-%m-%d")
-        if prev and (d_obj - prev).days == 1:
-            streak += 1
-        else:
-            streak = 1
-        if streak > max_streak:
-            max_streak = streak
-        prev = d_obj
+    log_days = aggregates["days"]
     months = []
     for month in range(1, 13):
         cal = calendar.monthcalendar(year, month)
         month_name = calendar.month_abbr[month]
-        lines = [f"[bold]{month_name}[/bold]"]
+        month_total = aggregates["months"].get(f"{year}-{month:02d}", 0)
+        lines = [f"[bold]{month_name}[/bold] ({month_total})"]
         for week in cal:
             week_str = ""
             for day in week:
@@ -363,7 +497,8 @@ def show_heatmap():
             lines.append(week_str)
         months.append(Text("\n".join(lines)))
     legend = Text("[color(46)]■[/color(46)] 1 log  [color(226)]■[/color(226)] 2 logs  [color(196)]■[/color(196)] 3+ logs  [grey]·[/grey] no log", justify="center")
-    stats = f"[cyan]Total logs:[/cyan] {len(files)}   [cyan]Longest streak:[/cyan] {max_streak} days"
+    total_logs = sum(aggregates["months"].values())
+    stats = f"[cyan]Total logs:[/cyan] {total_logs}   [cyan]Longest streak:[/cyan] {aggregates['longest']} days"
     console.print(Panel(Columns(months, equal=True, expand=True), title="Journal Activity Heatmap", expand=True))
     console.print(legend)
     console.print(stats)
@@ -372,8 +507,8 @@ def show_heatmap():
 def viewer_menu():
     while True:
         console.print("\n[bold cyan]StandLog Viewer[/bold cyan]")
-        console.print("[1] Show weekly stats\n[2] Export as Markdown\n[3] Export as JSON\n[4] Reminder\n[5] Leave feedback\n[6] View feedback\n[7] Enable encryption\n[8] Disable encryption\n[9] Visualize journal (heatmap)\n[10] Back")
-        choice = Prompt.ask("Choose an option", choices=[str(i) for i in range(1,11)], default="1")
+        console.print("[1] Show weekly stats\n[2] Export as Markdown\n[3] Export as JSON\n[4] Reminder\n[5] Leave feedback\n[6] View feedback\n[7] Enable encryption\n[8] Disable encryption\n[9] Visualize journal (heatmap)\n[10] Export as JSON Lines\n[11] Back")
+        choice = Prompt.ask("Choose an option", choices=[str(i) for i in range(1,12)], default="1")
         if choice == "1":
             show_weekly_stats()
         elif choice == "2":
@@ -407,4 +542,6 @@ def viewer_menu():
         elif choice == "9":
             show_heatmap()
         elif choice == "10":
+            export_logs("jsonl")
+        elif choice == "11":
             break
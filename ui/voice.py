@@ -8,12 +8,13 @@ from datetime import datetime, timedelta
 import os
 import json
 import re
-import tempfile
-import sounddevice as sd
-from scipy.io.wavfile import write, read as wavread
-import numpy as np
 import threading
+import queue
 import time
+from collections import deque, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from ui.index import index_entry
+from ui.storage import write_json
 
 # Try to import speech recognition library
 try:
@@ -26,9 +27,24 @@ console = Console()
 
 # Path for data directory
 DATA_DIR = os.path.expanduser("~/.standlog/entries")
-VOICE_DIR = os.path.expanduser("~/.standlog/voice")
 GOALS_PATH = os.path.expanduser("~/.standlog/goals.json")
 VOICE_COMMANDS_CONFIG_PATH = os.path.expanduser("~/.standlog/voice_commands_config.json")
+SAMPLE_RATE = 44100
+# Streaming listener: audio arrives in blocks of this length and each utterance keeps a little lead-in
+VAD_BLOCK_SECONDS = 0.03
+VAD_PREROLL_SECONDS = 0.3
+# The noise floor follows background level; a block is voiced when it is this much louder
+VAD_NOISE_RATIO = 3.0
+VAD_NOISE_ADAPT = 0.05
+
+# Cue tones (Hz) played before a recording and after the activation phrase
+CUE_TONES = {"prompt": 440, "activation": 880}
+CUE_SECONDS = 0.1
+# Longest single capture the warm stream can serve
+WARM_STREAM_SECONDS = 20
+
+_recognizer = None
+_audio_session = None
 
 # Default voice commands configuration
 DEFAULT_VOICE_COMMANDS_CONFIG = {
@@ -39,58 +55,82 @@ DEFAULT_VOICE_COMMANDS_CONFIG = {
     "command_timeout": 5,  # seconds
     "confidence_threshold": 0.6,
     "api_key": "",  # For services that require an API key
-    "custom_commands": []
+    "custom_commands": [],
+    "vad_energy_threshold": 500,  # minimum RMS of a voiced block (int16 scale)
+    "vad_silence_seconds": 0.6,  # silence that ends an utterance
+    "vad_max_utterance_seconds": 8,
+    "pipelined_transcription": True,  # record the next log field while the previous one is transcribed
+    "voice_note_format": "wav"  # wav (44.1 kHz), wav16k, or flac (16 kHz, needs soundfile)
 }
 
+# Spoken fields of a voice log entry: (key, prompt, recording seconds)
+VOICE_LOG_FIELDS = [
+    ("did", "What did you work on today? (Speak after the beep)", 15),
+    ("will_do", "What will you work on next? (Speak after the beep)", 15),
+    ("blockers", "Any blockers? (Speak after the beep)", 10),
+    ("tags", "Any tags? (Speak comma-separated tags after the beep)", 5),
+    ("time_spent", "How much time did you spend today in minutes? (Speak after the beep)", 5),
+]
+
 # Command patterns for natural language processing
+# Each pattern may capture its parameter in a group named "arg"
 COMMAND_PATTERNS = {
     "log_entry": [
-        r"log (today|an entry|a standup)",
-        r"create (a log|an entry|a standup)",
-        r"start (logging|a log entry)"
+        r"log (?:today|an entry|a standup)",
+        r"create (?:a log|an entry|a standup)",
+        r"start (?:logging|a log entry)"
     ],
     "view_entry": [
-        r"show (today's log|today's entry|my log|my entry)",
-        r"view (today's log|today's entry|my log|my entry)",
-        r"display (today's log|today's entry|my log|my entry)"
+        r"show (?:today's log|today's entry|my log|my entry)",
+        r"view (?:today's log|today's entry|my log|my entry)",
+        r"display (?:today's log|today's entry|my log|my entry)"
     ],
     "search_logs": [
-        r"search (for|logs|entries) (.*)",
-        r"find (logs|entries) (.*)",
-        r"look for (logs|entries) (.*)"
+        r"search (?:for|logs|entries) (?P<arg>.*)",
+        r"find (?:logs|entries) (?P<arg>.*)",
+        r"look for (?:logs|entries) (?P<arg>.*)"
     ],
     "time_tracking": [
-        r"show (time tracking|time stats|time statistics)",
-        r"view (time tracking|time stats|time statistics)",
-        r"how much time (did I spend|have I spent)"
+        r"show (?:time tracking|time stats|time statistics)",
+        r"view (?:time tracking|time stats|time statistics)",
+        r"how much time (?:did i spend|have i spent)"
     ],
     "set_goals": [
-        r"set (goals|weekly goals)",
-        r"create (goals|weekly goals)",
-        r"add (goals|weekly goals)"
+        r"set (?:goals|weekly goals)",
+        r"create (?:goals|weekly goals)",
+        r"add (?:goals|weekly goals)"
     ],
     "mark_goal": [
-        r"mark goal (.*) (as done|as complete|complete|done)",
-        r"complete goal (.*)",
-        r"finish goal (.*)"
+        r"mark goal (?P<arg>.*?) (?:as done|as complete|complete|done)",
+        r"complete goal (?P<arg>.*)",
+        r"finish goal (?P<arg>.*)"
     ],
     "start_pomodoro": [
-        r"start (a pomodoro|pomodoro|timer)",
-        r"begin (a pomodoro|pomodoro|timer)",
-        r"pomodoro (start|begin)"
+        r"start (?:a pomodoro|pomodoro|timer)",
+        r"begin (?:a pomodoro|pomodoro|timer)",
+        r"pomodoro (?:start|begin)"
     ],
     "log_mood": [
-        r"log (my mood|mood)",
-        r"set (my mood|mood)",
-        r"record (my mood|mood)"
+        r"log (?:my mood|mood)",
+        r"set (?:my mood|mood)",
+        r"record (?:my mood|mood)"
     ],
     "query_past": [
-        r"what did I (do|work on) (on|last) (.*)",
-        r"show me (what I did|my log|my entry) (on|for) (.*)",
-        r"find (what I did|my log|my entry) (on|for) (.*)"
+        r"what did i (?:do|work on) (?:on|last) (?P<arg>.*)",
+        r"show me (?:what i did|my log|my entry) (?:on|for) (?P<arg>.*)",
+        r"find (?:what i did|my log|my entry) (?:on|for) (?P<arg>.*)"
     ]
 }
 
+# Words that carry no command meaning and are ignored when scoring a match
+WORD_RE = re.compile(r"[a-z0-9']+")
+LEADING_WORD_RE = re.compile(r"([a-z0-9']+)(?= |$)")
+# A match with this many literal (non-filler, non-argument) characters is fully specific
+SPECIFIC_MATCH_CHARS = 6
+# Confidence factor for a command found after other words rather than leading the utterance
+MID_UTTERANCE_FACTOR = 0.8
+FILLER_WORDS = {"please", "can", "could", "would", "you", "hey", "standlog", "the", "now", "for", "me", "just", "and", "um", "uh"}
+
 # Mapping of day names to date offsets for natural language processing
 DAY_MAPPING = {
     "yesterday": 1,
@@ -116,8 +156,7 @@ def load_voice_commands_config():
     """Load voice commands configuration or create default if not exists"""
     if not os.path.exists(VOICE_COMMANDS_CONFIG_PATH):
         os.makedirs(os.path.dirname(VOICE_COMMANDS_CONFIG_PATH), exist_ok=True)
-        with open(VOICE_COMMANDS_CONFIG_PATH, "w") as f:
-            json.dump(DEFAULT_VOICE_COMMANDS_CONFIG, f, indent=2)
+        write_json(VOICE_COMMANDS_CONFIG_PATH, DEFAULT_VOICE_COMMANDS_CONFIG)
         return DEFAULT_VOICE_COMMANDS_CONFIG
     
     try:
@@ -132,8 +171,7 @@ def load_voice_commands_config():
 def save_voice_commands_config(config):
     """Save voice commands configuration"""
     try:
-        with open(VOICE_COMMANDS_CONFIG_PATH, "w") as f:
-            json.dump(config, f, indent=2)
+        write_json(VOICE_COMMANDS_CONFIG_PATH, config)
         return True
     except Exception as e:
         console.print(f"[red]Error saving voice commands config: {e}[/red]")
@@ -202,12 +240,289 @@ def get_date_from_day_name(day_name):
     return None
 
 
-def record_audio(duration=5, fs=44100):
-    """Record audio for a specified duration"""
+def to_audio_data(samples, fs=SAMPLE_RATE):
+    """Wrap a mono int16 sample buffer as recognizer input, without touching disk"""
+    if not SPEECH_RECOGNITION_AVAILABLE:
+        return None
+    import numpy as np
+    return sr.AudioData(np.ascontiguousarray(samples, dtype=np.int16).tobytes(), fs, 2)
+
+
+class RingBufferRecorder:
+    """Keep the last `seconds` of microphone input in a preallocated int16 ring buffer"""
+
+    def __init__(self, seconds=10, fs=SAMPLE_RATE):
+        import numpy as np
+        self.fs = fs
+        self.buffer = np.zeros(int(seconds * fs), dtype=np.int16)
+        self.write_pos = 0
+        self.total = 0
+        self.lock = threading.Lock()
+        self.stream = None
+
+    def callback(self, indata, frames, time_info, status):
+        samples = indata[:, 0]
+        with self.lock:
+            size = len(self.buffer)
+            if frames >= size:
+                self.buffer[:] = samples[-size:]
+                self.write_pos = 0
+            else:
+                first = min(frames, size - self.write_pos)
+                self.buffer[self.write_pos:self.write_pos + first] = samples[:first]
+                self.buffer[:frames - first] = samples[first:]
+                self.write_pos = (self.write_pos + frames) % size
+            self.total += frames
+
+    def start(self, device=None):
+        import sounddevice as sd
+        self.stream = sd.InputStream(samplerate=self.fs, channels=1, dtype='int16',
+                                     device=device, callback=self.callback)
+        self.stream.start()
+        return self
+
+    def stop(self):
+        if self.stream is not None:
+            self.stream.stop()
+            self.stream.close()
+            self.stream = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def latest(self, seconds):
+        """Return a copy of the most recent `seconds` of audio, oldest sample first"""
+        with self.lock:
+            count = min(int(seconds * self.fs), len(self.buffer), self.total)
+            start = (self.write_pos - count) % len(self.buffer)
+            if start + count <= len(self.buffer):
+                return self.buffer[start:start + count].copy()
+            import numpy as np
+            return np.concatenate((self.buffer[start:], self.buffer[:self.write_pos]))
+
+    def audio_data(self, seconds):
+        return to_audio_data(self.latest(seconds), self.fs)
+
+
+class StreamingListener:
+    """Split live microphone input into utterances and transcribe them in a worker thread.
+
+    The InputStream callback only measures block energy; silence never reaches the
+    recognizer, and capture keeps running while an utterance is being transcribed.
+    """
+
+    def __init__(self, config, fs=SAMPLE_RATE):
+        self.config = config
+        self.fs = fs
+        self.block = int(VAD_BLOCK_SECONDS * fs)
+        self.min_energy = config.get("vad_energy_threshold", 500)
+        self.hangover_blocks = max(1, int(config.get("vad_silence_seconds", 0.6) / VAD_BLOCK_SECONDS))
+        self.max_blocks = int(config.get("vad_max_utterance_seconds", 8) / VAD_BLOCK_SECONDS)
+        self.noise_floor = float(self.min_energy) / VAD_NOISE_RATIO
+        self.preroll = deque(maxlen=max(1, int(VAD_PREROLL_SECONDS / VAD_BLOCK_SECONDS)))
+        self.current = None
+        self.silent_blocks = 0
+        self.utterances = queue.Queue()
+        self.transcripts = queue.Queue()
+        self.stream = None
+        self.worker = None
+
+    def is_voiced(self, samples):
+        import numpy as np
+        energy = float(np.sqrt(np.mean(samples.astype(np.float32) ** 2)))
+        voiced = energy >= max(self.min_energy, self.noise_floor * VAD_NOISE_RATIO)
+        if not voiced:
+            self.noise_floor += VAD_NOISE_ADAPT * (energy - self.noise_floor)
+        return voiced
+
+    def callback(self, indata, frames, time_info, status):
+        samples = indata[:, 0].copy()
+        voiced = self.is_voiced(samples)
+        if self.current is None:
+            if voiced:
+                self.current = list(self.preroll) + [samples]
+                self.silent_blocks = 0
+            else:
+                self.preroll.append(samples)
+            return
+        self.current.append(samples)
+        self.silent_blocks = 0 if voiced else self.silent_blocks + 1
+        if self.silent_blocks >= self.hangover_blocks or len(self.current) >= self.max_blocks:
+            import numpy as np
+            self.utterances.put(np.concatenate(self.current))
+            self.current = None
+            self.preroll.clear()
+
+    def _transcribe_loop(self):
+        while True:
+            samples = self.utterances.get()
+            if samples is None:
+                break
+            text = transcribe_audio(to_audio_data(samples, self.fs), self.config)
+            if text:
+                self.transcripts.put(text)
+
+    def start(self):
+        self.worker = threading.Thread(target=self._transcribe_loop, daemon=True)
+        self.worker.start()
+        import sounddevice as sd
+        session = get_audio_session()
+        session.release()
+        self.stream = sd.InputStream(samplerate=self.fs, channels=1, dtype='int16', device=session.input_device(),
+                                     blocksize=self.block, callback=self.callback)
+        self.stream.start()
+        return self
+
+    def pause(self):
+        """Stop capturing (e.g. while a command records on its own) and drop pending audio"""
+        if self.stream is not None:
+            self.stream.stop()
+        self.current = None
+        self.preroll.clear()
+        for pending in (self.utterances, self.transcripts):
+            while not pending.empty():
+                pending.get_nowait()
+
+    def resume(self):
+        if self.stream is not None:
+            get_audio_session().release()
+            self.stream.start()
+
+    def stop(self):
+        if self.stream is not None:
+            self.stream.stop()
+            self.stream.close()
+            self.stream = None
+        if self.worker is not None:
+            self.utterances.put(None)
+            self.worker.join()
+            self.worker = None
+
+    def next_transcript(self, timeout=None):
+        """Return the next recognized utterance, or None after `timeout` seconds"""
+        try:
+            return self.transcripts.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+def make_tone(frequency, seconds=CUE_SECONDS, fs=SAMPLE_RATE):
+    """A float32 sine cue of the given frequency and length"""
+    import numpy as np
+    return np.sin(2 * np.pi * frequency * np.arange(int(seconds * fs)) / fs).astype(np.float32)
+
+
+class AudioSession:
+    """Shared audio state: precomputed cue tones, the cached input device and a warm input stream.
+
+    It also records how long each capture started after its cue ended (see latency_report).
+    """
+
+    def __init__(self, fs=SAMPLE_RATE):
+        self.fs = fs
+        self.tones = {name: make_tone(freq, fs=fs) for name, freq in CUE_TONES.items()}
+        self.devices = None
+        self.device = None
+        self.recorder = None
+        self.cue_ended = None
+        self.latencies = []
+
+    def query_devices(self, refresh=False):
+        """Return the input devices, querying PortAudio only once per session"""
+        if self.devices is None or refresh:
+            import sounddevice as sd
+            self.devices = [dict(d, index=i) for i, d in enumerate(sd.query_devices())
+                            if d.get('max_input_channels', 0) > 0]
+            try:
+                default = sd.default.device[0]
+            except (TypeError, IndexError):
+                default = sd.default.device
+            indexes = [d["index"] for d in self.devices]
+            self.device = default if default in indexes else (indexes[0] if indexes else None)
+        return self.devices
+
+    def input_device(self):
+        """Index of the selected microphone, or None if there is none"""
+        self.query_devices()
+        return self.device
+
+    def cue(self, name="prompt"):
+        """Play a cue tone and mark the moment capture may start"""
+        import sounddevice as sd
+        sd.play(self.tones[name], self.fs)
+        sd.wait()
+        self.cue_ended = time.perf_counter()
+
+    def warm(self, seconds=WARM_STREAM_SECONDS):
+        """Open (or reuse) the background input stream that recordings are cut from"""
+        if self.recorder is not None and len(self.recorder.buffer) < seconds * self.fs:
+            self.release()
+        if self.recorder is None:
+            seconds = max(seconds, WARM_STREAM_SECONDS)
+            self.recorder = RingBufferRecorder(seconds=seconds, fs=self.fs).start(self.input_device())
+        return self.recorder
+
+    def release(self):
+        """Close the warm stream, e.g. before another component opens the microphone"""
+        if self.recorder is not None:
+            self.recorder.stop()
+            self.recorder = None
+
+    def record(self, duration, progress=None, task=None):
+        """Capture `duration` seconds from the warm stream as an int16 array"""
+        recorder = self.warm(duration)
+        start = recorder.total
+        if self.cue_ended is not None:
+            self.latencies.append(time.perf_counter() - self.cue_ended)
+            self.cue_ended = None
+        needed = int(duration * self.fs)
+        deadline = time.monotonic() + duration + 2
+        while recorder.total - start < needed and time.monotonic() < deadline:
+            time.sleep(0.05)
+            if progress is not None:
+                progress.update(task, completed=min(duration, (recorder.total - start) / self.fs))
+        return recorder.latest(min(duration, (recorder.total - start) / self.fs))
+
+    def latency_report(self):
+        """Cue-to-capture latency statistics in milliseconds"""
+        if not self.latencies:
+            return {"captures": 0}
+        import numpy as np
+        values = np.array(self.latencies) * 1000
+        return {"captures": len(values), "mean_ms": float(values.mean()), "max_ms": float(values.max()),
+                "last_ms": float(values[-1])}
+
+
+def get_audio_session():
+    """The process-wide AudioSession"""
+    global _audio_session
+    if _audio_session is None:
+        _audio_session = AudioSession()
+    return _audio_session
+
+
+def show_latency_report():
+    report = get_audio_session().latency_report()
+    if not report["captures"]:
+        console.print("[yellow]No recordings yet in this session.[/yellow]")
+        return
+    table = Table(title="Prompt-to-Capture Latency")
+    table.add_column("Captures", style="cyan")
+    table.add_column("Mean (ms)", style="green")
+    table.add_column("Max (ms)", style="yellow")
+    table.add_column("Last (ms)", style="magenta")
+    table.add_row(str(report["captures"]), f"{report['mean_ms']:.1f}", f"{report['max_ms']:.1f}", f"{report['last_ms']:.1f}")
+    console.print(table)
+
+
+def record_audio(duration=5, fs=SAMPLE_RATE):
+    """Record audio for a specified duration and return it as in-memory AudioData"""
+    session = get_audio_session()
     try:
-        devices = sd.query_devices()
-        input_devices = [d for d in devices if d.get('max_input_channels', 0) > 0]
-        if not input_devices:
+        if session.input_device() is None:
             console.print("[yellow]No input device (microphone) found.[/yellow]")
             return None
     except Exception as e:
@@ -216,52 +531,48 @@ def record_audio(duration=5, fs=44100):
     
     with Progress() as progress:
         task = progress.add_task("[cyan]Recording...[/cyan]", total=duration)
-        
-        # Start recording in a separate thread
-        recording = sd.rec(int(duration * fs), samplerate=fs, channels=1, dtype='int16')
-        
-        # Update progress bar
-        for _ in range(duration):
-            time.sleep(1)
-            progress.update(task, advance=1)
-        
-        sd.wait()  # Wait for recording to complete
+        recording = session.record(duration, progress, task)
     
-    tmpfile = tempfile.NamedTemporaryFile(delete=False, suffix='.wav')
-    write(tmpfile.name, fs, recording)
-    tmpfile.close()
-    return tmpfile.name
+    return to_audio_data(recording, session.fs)
 
 
-def transcribe_audio(audio_file, config=None):
-    """Transcribe audio file to text using speech recognition"""
+def _get_recognizer():
+    global _recognizer
+    if _recognizer is None:
+        _recognizer = sr.Recognizer()
+    return _recognizer
+
+
+def transcribe_audio(audio, config=None):
+    """Transcribe AudioData (or a path to an audio file) to text using speech recognition"""
     if not check_speech_recognition():
         return None
     
     if config is None:
         config = load_voice_commands_config()
     
-    recognizer = sr.Recognizer()
+    recognizer = _get_recognizer()
     
     try:
-        with sr.AudioFile(audio_file) as source:
-            audio_data = recognizer.record(source)
-            
-            # Use the configured recognition engine
-            engine = config.get("recognition_engine", "google").lower()
-            language = config.get("language", "en-US")
+        if isinstance(audio, str):
+            with sr.AudioFile(audio) as source:
+                audio = recognizer.record(source)
+        
+        # Use the configured recognition engine
+        engine = config.get("recognition_engine", "google").lower()
+        language = config.get("language", "en-US")
+        
+        if engine == "google":
+            text = recognizer.recognize_google(audio, language=language)
+        elif engine == "sphinx":
+            text = recognizer.recognize_sphinx(audio, language=language)
+        elif engine == "azure" and config.get("api_key"):
+            text = recognizer.recognize_azure(audio, key=config.get("api_key"), language=language)
+        else:
+            # Default to Google if engine not supported
+            text = recognizer.recognize_google(audio, language=language)
             
-            if engine == "google":
-                text = recognizer.recognize_google(audio_data, language=language)
-            elif engine == "sphinx":
-                text = recognizer.recognize_sphinx(audio_data, language=language)
-            elif engine == "azure" and config.get("api_key"):
-                text = recognizer.recognize_azure(audio_data, key=config.get("api_key"), language=language)
-            else:
-                # Default to Google if engine not supported
-                text = recognizer.recognize_google(audio_data, language=language)
-                
-            return text.lower()
+        return text.lower()
     except sr.UnknownValueError:
         console.print("[yellow]Speech recognition could not understand audio[/yellow]")
     except sr.RequestError as e:
@@ -272,23 +583,123 @@ def transcribe_audio(audio_file, config=None):
     return None
 
 
-def parse_command(text):
+def _has_top_level_alternation(pattern):
+    """True if `pattern` has a | outside any group or character class"""
+    depth = 0
+    in_class = False
+    escaped = False
+    for char in pattern:
+        if escaped:
+            escaped = False
+        elif char == "\\":
+            escaped = True
+        elif in_class:
+            in_class = char != "]"
+        elif char == "[":
+            in_class = True
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif char == "|" and depth == 0:
+            return True
+    return False
+
+
+class CommandGrammar:
+    """Command patterns precompiled and indexed by their first literal word.
+
+    Built-in patterns and the user's custom_commands are merged when the grammar is
+    built. Matching is one pass over the word starts of the transcript, trying only
+    the patterns whose first word is the word found there.
+
+    Confidence measures how specific the match is, not how much of the utterance it
+    covers, so extra words around a command ("log today's standup") don't count against it.
+    """
+
+    def __init__(self, custom_commands=()):
+        self.by_first_word = defaultdict(list)
+        self.anywhere = []
+        rules = [(command, pattern, pattern) for command, patterns in COMMAND_PATTERNS.items() for pattern in patterns]
+        for custom in custom_commands:
+            if not custom.get("command"):
+                continue
+            if custom.get("pattern"):
+                rules.append((custom["command"], custom["pattern"], custom["pattern"]))
+            elif custom.get("phrase"):
+                # Index by the raw phrase: re.escape turns its spaces into "\ "
+                phrase = custom["phrase"].lower()
+                rules.append((custom["command"], re.escape(phrase), phrase))
+        for command, pattern, source in rules:
+            try:
+                compiled = re.compile(pattern)
+            except re.error as e:
+                console.print(f"[yellow]Skipping invalid voice command pattern {pattern!r}: {e}[/yellow]")
+                continue
+            # "hi there|hello" can start with either branch, so it can't be indexed by "hi"
+            first = None if _has_top_level_alternation(pattern) else LEADING_WORD_RE.match(source)
+            if first:
+                self.by_first_word[first.group(1)].append((command, compiled))
+            else:
+                self.anywhere.append((command, compiled))
+
+    def match(self, text):
+        """Return (command, params, confidence) for the best match, or (None, None, 0.0)"""
+        if not text:
+            return None, None, 0.0
+        text = text.lower()
+        best = (None, None, 0.0)
+        best_key = (0.0, 0)
+        lead = None
+        for word in WORD_RE.finditer(text):
+            if lead is None and word.group() not in FILLER_WORDS:
+                lead = word.start()
+            candidates = self.by_first_word.get(word.group(), ())
+            if self.anywhere:
+                candidates = list(candidates) + self.anywhere
+            for command, compiled in candidates:
+                match = compiled.match(text, word.start())
+                if not match:
+                    continue
+                literal = match.group()
+                if match.groupdict().get("arg") is not None:
+                    literal = text[match.start():match.start("arg")] + " " + text[match.end("arg"):match.end()]
+                specific = sum(len(w) for w in literal.split() if w not in FILLER_WORDS)
+                confidence = min(1.0, specific / SPECIFIC_MATCH_CHARS)
+                if lead is not None and match.start() > lead:
+                    confidence *= MID_UTTERANCE_FACTOR
+                # Equally confident matches: the longer one wins
+                key = (confidence, match.end() - match.start())
+                if key > best_key:
+                    best_key = key
+                    arg = match.groupdict().get("arg")
+                    best = (command, (arg.strip(),) if arg and arg.strip() else None, confidence)
+        return best
+
+
+_grammar_cache = {}
+
+
+def get_command_grammar(config=None):
+    """The compiled grammar for the configured custom commands (built once per distinct set)"""
+    if config is None:
+        config = load_voice_commands_config()
+    key = json.dumps(config.get("custom_commands", []), sort_keys=True)
+    if key not in _grammar_cache:
+        _grammar_cache.clear()
+        _grammar_cache[key] = CommandGrammar(config.get("custom_commands", []))
+    return _grammar_cache[key]
+
+
+def match_command(text, config=None):
+    """Identify the command in text, returning (command, params, confidence)"""
+    return get_command_grammar(config).match(text)
+
+
+def parse_command(text, config=None):
     """Parse text to identify command and parameters"""
-    if not text:
-        return None, None
-    
-    text = text.lower()
-    
-    # Check each command pattern
-    for command, patterns in COMMAND_PATTERNS.items():
-        for pattern in patterns:
-            match = re.search(pattern, text)
-            if match:
-                # Extract parameters if any
-                params = match.groups()[1:] if len(match.groups()) > 1 else None
-                return command, params
-    
-    return None, None
+    command, params, _ = match_command(text, config)
+    return command, params
 
 
 def execute_command(command, params=None):
@@ -344,6 +755,32 @@ def execute_command(command, params=None):
         console.print("[yellow]Command not recognized or not implemented yet.[/yellow]")
 
 
+def record_fields(fields, config, pipelined=True):
+    """Prompt for and record each (key, prompt, seconds) field, returning {key: text}.
+
+    When pipelined, each recording is handed to a background transcriber so the next
+    field is recorded while the previous one is being recognized.
+    """
+    answers = {}
+    pending = {}
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        for key, prompt, duration in fields:
+            console.print(f"\n[cyan]{prompt}[/cyan]")
+            get_audio_session().cue()
+            audio = record_audio(duration=duration)
+            if audio is None:
+                answers[key] = ""
+            elif pipelined:
+                pending[key] = pool.submit(transcribe_audio, audio, config)
+            else:
+                answers[key] = transcribe_audio(audio, config) or ""
+        if pending:
+            console.print("[dim]Finishing transcription...[/dim]")
+        for key, future in pending.items():
+            answers[key] = future.result() or ""
+    return answers
+
+
 def voice_to_text_log():
     """Create a log entry using voice-to-text"""
     if not check_speech_recognition():
@@ -351,50 +788,17 @@ def voice_to_text_log():
     
     console.print(Panel("[bold cyan]Voice-to-Text Log Entry[/bold cyan]", expand=False))
     
-    # What did you work on today?
-    console.print("[cyan]What did you work on today? (Speak after the beep)[/cyan]")
-    sd.play(np.sin(2 * np.pi * 440 * np.arange(44100) / 44100)[:4410].astype(np.float32), 44100)
-    sd.wait()
-    audio_file = record_audio(duration=15)
-    did = transcribe_audio(audio_file) if audio_file else ""
+    config = load_voice_commands_config()
+    answers = record_fields(VOICE_LOG_FIELDS, config, pipelined=config.get("pipelined_transcription", True))
+    did = answers["did"]
+    will_do = answers["will_do"]
+    blockers = answers["blockers"]
+    tags = [t.strip() for t in answers["tags"].split(",") if t.strip()]
     console.print(f"[dim]Transcribed: {did}[/dim]")
-    os.unlink(audio_file)
-    
-    # What will you work on next?
-    console.print("\n[cyan]What will you work on next? (Speak after the beep)[/cyan]")
-    sd.play(np.sin(2 * np.pi * 440 * np.arange(44100) / 44100)[:4410].astype(np.float32), 44100)
-    sd.wait()
-    audio_file = record_audio(duration=15)
-    will_do = transcribe_audio(audio_file) if audio_file else ""
     console.print(f"[dim]Transcribed: {will_do}[/dim]")
-    os.unlink(audio_file)
-    
-    # Any blockers?
-    console.print("\n[cyan]Any blockers? (Speak after the beep)[/cyan]")
-    sd.play(np.sin(2 * np.pi * 440 * np.arange(44100) / 44100)[:4410].astype(np.float32), 44100)
-    sd.wait()
-    audio_file = record_audio(duration=10)
-    blockers = transcribe_audio(audio_file) if audio_file else ""
     console.print(f"[dim]Transcribed: {blockers}[/dim]")
-    os.unlink(audio_file)
-    
-    # Tags
-    console.print("\n[cyan]Any tags? (Speak comma-separated tags after the beep)[/cyan]")
-    sd.play(np.sin(2 * np.pi * 440 * np.arange(44100) / 44100)[:4410].astype(np.float32), 44100)
-    sd.wait()
-    audio_file = record_audio(duration=5)
-    tags_text = transcribe_audio(audio_file) if audio_file else ""
-    tags = [t.strip() for t in tags_text.split(",") if t.strip()]
     console.print(f"[dim]Transcribed tags: {', '.join(tags) if tags else 'None'}[/dim]")
-    os.unlink(audio_file)
-    
-    # Time spent
-    console.print("\n[cyan]How much time did you spend today in minutes? (Speak after the beep)[/cyan]")
-    sd.play(np.sin(2 * np.pi * 440 * np.arange(44100) / 44100)[:4410].astype(np.float32), 44100)
-    sd.wait()
-    audio_file = record_audio(duration=5)
-    time_text = transcribe_audio(audio_file) if audio_file else "0"
-    os.unlink(audio_file)
+    time_text = answers["time_spent"] or "0"
     
     # Try to extract a number from the time text
     time_spent = 0
@@ -422,18 +826,16 @@ def voice_to_text_log():
     # Save the entry
     path = os.path.join(DATA_DIR, datetime.now().strftime("%Y-%m-%d") + ".json")
     os.makedirs(os.path.dirname(path), exist_ok=True)
-    with open(path, "w") as f:
-        json.dump(entry, f, indent=2)
+    write_json(path, entry)
+    index_entry(os.path.basename(path), entry)
     
     console.print("[bold green]Voice log entry saved![/bold green]")
     
     # Ask if user wants to add a mood
     console.print("\n[cyan]Would you like to log your mood? (Say yes or no)[/cyan]")
-    sd.play(np.sin(2 * np.pi * 440 * np.arange(44100) / 44100)[:4410].astype(np.float32), 44100)
-    sd.wait()
-    audio_file = record_audio(duration=3)
-    response = transcribe_audio(audio_file) if audio_file else ""
-    os.unlink(audio_file)
+    get_audio_session().cue()
+    audio = record_audio(duration=3)
+    response = transcribe_audio(audio) if audio else ""
     
     if response and ("yes" in response.lower() or "yeah" in response.lower()):
         voice_to_text_mood()
@@ -450,11 +852,9 @@ def voice_to_text_goals():
     goals = []
     while True:
         console.print(f"\n[cyan]Goal #{len(goals)+1} (or say 'done' to finish):[/cyan]")
-        sd.play(np.sin(2 * np.pi * 440 * np.arange(44100) / 44100)[:4410].astype(np.float32), 44100)
-        sd.wait()
-        audio_file = record_audio(duration=10)
-        goal_text = transcribe_audio(audio_file) if audio_file else ""
-        os.unlink(audio_file)
+        get_audio_session().cue()
+        audio = record_audio(duration=10)
+        goal_text = transcribe_audio(audio) if audio else ""
         
         if not goal_text:
             console.print("[yellow]Could not understand. Please try again.[/yellow]")
@@ -468,8 +868,7 @@ def voice_to_text_goals():
         goals.append({"goal": goal_text, "done": False})
     
     if goals:
-        with open(GOALS_PATH, "w") as f:
-            json.dump(goals, f, indent=2)
+        write_json(GOALS_PATH, goals)
         console.print(f"[green]{len(goals)} goals saved![/green]")
     else:
         console.print("[yellow]No goals were set.[/yellow]")
@@ -486,11 +885,9 @@ def voice_to_text_mood():
     console.print("[magenta]How are you feeling today on a scale of 1 to 5?[/magenta]")
     console.print("1: 😞 Very Bad, 2: 😟 Bad, 3: 😐 Neutral, 4: 😊 Good, 5: 😄 Very Good")
     
-    sd.play(np.sin(2 * np.pi * 440 * np.arange(44100) / 44100)[:4410].astype(np.float32), 44100)
-    sd.wait()
-    audio_file = record_audio(duration=3)
-    mood_text = transcribe_audio(audio_file) if audio_file else ""
-    os.unlink(audio_file)
+    get_audio_session().cue()
+    audio = record_audio(duration=3)
+    mood_text = transcribe_audio(audio) if audio else ""
     
     # Try to extract a number from the mood text
     mood = None
@@ -556,8 +953,7 @@ def mark_goal_by_voice(goal_identifier):
     
     if goal_idx is not None and 0 <= goal_idx < len(goals):
         goals[goal_idx]["done"] = True
-        with open(GOALS_PATH, "w") as f:
-            json.dump(goals, f, indent=2)
+        write_json(GOALS_PATH, goals)
         console.print(f"[green]Goal #{goal_idx+1} marked as complete![/green]")
     else:
         # If not a number, try to match by goal text
@@ -567,11 +963,9 @@ def mark_goal_by_voice(goal_identifier):
             console.print(f"[{idx+1}] {g['goal']} {status}")
         
         console.print("\n[cyan]Say the number of the goal to mark as complete:[/cyan]")
-        sd.play(np.sin(2 * np.pi * 440 * np.arange(44100) / 44100)[:4410].astype(np.float32), 44100)
-        sd.wait()
-        audio_file = record_audio(duration=3)
-        response = transcribe_audio(audio_file) if audio_file else ""
-        os.unlink(audio_file)
+        get_audio_session().cue()
+        audio = record_audio(duration=3)
+        response = transcribe_audio(audio) if audio else ""
         
         # Try to extract a number from the response
         match = re.search(r'\d+', response)
@@ -580,8 +974,7 @@ def mark_goal_by_voice(goal_identifier):
                 goal_idx = int(match.group()) - 1
                 if 0 <= goal_idx < len(goals):
                     goals[goal_idx]["done"] = True
-                    with open(GOALS_PATH, "w") as f:
-                        json.dump(goals, f, indent=2)
+                    write_json(GOALS_PATH, goals)
                     console.print(f"[green]Goal #{goal_idx+1} marked as complete![/green]")
                 else:
                     console.print("[red]Invalid goal number.[/red]")
@@ -593,47 +986,27 @@ def mark_goal_by_voice(goal_identifier):
 
 def view_log_by_date(date_str):
     """View log entry for a specific date"""
-    path = os.path.join(DATA_DIR, f"{date_str}.json")
-    if not os.path.exists(path):
-        console.print(f"[red]No log entry found for {date_str}.[/red]")
+    # Same rendering as the menu's view, so encrypted entries and cached fragments work here too
+    from main import view_entry
+    view_entry(date_str)
+
+
+def _run_voice_command(listener, command_text):
+    console.print(f"[dim]Heard: {command_text}[/dim]")
+    command, params, confidence = match_command(command_text, listener.config)
+    if not command or confidence < listener.config.get("confidence_threshold", 0.6):
+        console.print("[yellow]Command not recognized. Please try again.[/yellow]")
         return
-    
-    with open(path) as f:
-        entry = json.load(f)
-    
-    pomodoro_info = f"\n[b]Pomodoros completed:[/b] {entry.get('pomodoro_count', 0)}" if entry.get('pomodoro_count', 0) > 0 else ""
-    
-    # Display mood if available
-    mood_info = ""
-    if entry.get('mood'):
-        from ui.mood import MOOD_EMOJIS, MOOD_COLORS
-        mood = entry.get('mood')
-        mood_text = MOOD_EMOJIS.get(mood, "Unknown")
-        mood_color = MOOD_COLORS.get(mood, "white")
-        mood_info = f"\n[b]Mood:[/b] [{mood_color}]{mood_text}[/{mood_color}]"
-    
-    panel = Panel(
-        f"[b]What I did:[/b] {entry['did']}\n"
-        f"[b]What I'll do:[/b] {entry['will_do']}\n"
-        f"[b]Blockers:[/b] {entry['blockers']}\n"
-        f"[b]Tags:[/b] {', '.join(entry['tags']) if entry['tags'] else '-'}\n"
-        f"[b]Notes:[/b] {entry.get('notes','-')}\n"
-        f"[b]Time spent:[/b] {entry.get('time_spent', 0)} min{pomodoro_info}{mood_info}\n"
-        f"[b]Date:[/b] {entry['date']}", 
-        title=f"Log for {date_str}", 
-        expand=False
-    )
-    console.print(panel)
-    
-    if entry.get("voice_note") or os.path.exists(os.path.join(VOICE_DIR, os.path.basename(path).replace('.json', '.wav'))):
-        play = Prompt.ask("Play attached voice note? (y/n)", choices=["y","n"], default="n")
-        if play == "y":
-            from main import play_voice_note
-            play_voice_note(path)
-
-
-def listen_for_commands():
-    """Listen for voice commands in the background"""
+    console.print(f"[green]Recognized command: {command} ({confidence:.0%})[/green]")
+    listener.pause()
+    try:
+        execute_command(command, params)
+    finally:
+        listener.resume()
+
+
+def listen_for_commands(stop_event=None):
+    """Listen for voice commands until 'stop listening', Ctrl+C or `stop_event` is set"""
     if not check_speech_recognition():
         return
     
@@ -643,39 +1016,45 @@ def listen_for_commands():
         return
     
     activation_phrase = config.get("activation_phrase", "hey standlog").lower()
+    command_timeout = config.get("command_timeout", 5)
     
-    console.print(Panel(f"[bold green]Listening for voice commands...[/bold green]\n\nSay '{activation_phrase}' followed by your command.", expand=False))
+    console.print(Panel(f"[bold green]Listening for voice commands...[/bold green]\n\nSay '{activation_phrase}' followed by your command.\nSay 'stop listening' or press Ctrl+C to quit.", expand=False))
     
-    while True:
-        console.print("[dim]Listening for activation phrase...[/dim]")
-        audio_file = record_audio(duration=3)
-        text = transcribe_audio(audio_file, config) if audio_file else ""
-        os.unlink(audio_file)
-        
-        if text and activation_phrase in text.lower():
-            console.print(f"[green]Activation phrase detected! What would you like to do?[/green]")
-            sd.play(np.sin(2 * np.pi * 880 * np.arange(44100) / 44100)[:4410].astype(np.float32), 44100)
-            sd.wait()
-            
-            command_audio = record_audio(duration=config.get("command_timeout", 5))
-            command_text = transcribe_audio(command_audio, config) if command_audio else ""
-            os.unlink(command_audio)
-            
-            if command_text:
-                console.print(f"[dim]Heard: {command_text}[/dim]")
-                command, params = parse_command(command_text)
-                
-                if command:
-                    console.print(f"[green]Recognized command: {command}[/green]")
-                    execute_command(command, params)
-                else:
-                    console.print("[yellow]Command not recognized. Please try again.[/yellow]")
-            else:
+    listener = StreamingListener(config)
+    try:
+        listener.start()
+    except Exception as e:
+        console.print(f"[yellow]Could not open the microphone: {e}[/yellow]")
+        return
+    awaiting_command_until = None
+    try:
+        while stop_event is None or not stop_event.is_set():
+            text = listener.next_transcript(timeout=0.5)
+            if awaiting_command_until is not None and time.monotonic() > awaiting_command_until:
                 console.print("[yellow]Could not understand command. Please try again.[/yellow]")
-        
-        # Check if user wants to exit
-        if Prompt.ask("Press Enter to continue listening or 'q' to quit", default="") == "q":
-            break
+                awaiting_command_until = None
+            if not text:
+                continue
+            if "stop listening" in text:
+                break
+            if awaiting_command_until is not None:
+                awaiting_command_until = None
+                _run_voice_command(listener, text)
+            elif activation_phrase in text:
+                command_text = text.split(activation_phrase, 1)[1].strip()
+                if command_text:
+                    _run_voice_command(listener, command_text)
+                else:
+                    console.print(f"[green]Activation phrase detected! What would you like to do?[/green]")
+                    listener.pause()
+                    get_audio_session().cue("activation")
+                    listener.resume()
+                    awaiting_command_until = time.monotonic() + command_timeout
+    except KeyboardInterrupt:
+        pass
+    finally:
+        listener.stop()
+    console.print("[dim]Stopped listening.[/dim]")
 
 
 def start_voice_command_listener():
@@ -683,8 +1062,10 @@ def start_voice_command_listener():
     if not check_speech_recognition():
         return
     
-    thread = threading.Thread(target=listen_for_commands)
+    stop_event = threading.Event()
+    thread = threading.Thread(target=listen_for_commands, args=(stop_event,))
     thread.daemon = True  # Thread will exit when main program exits
+    thread.stop_event = stop_event
     thread.start()
     return thread
 
@@ -719,9 +1100,10 @@ def configure_voice_commands():
     console.print("[4] Change Activation Phrase")
     console.print("[5] Set Command Timeout")
     console.print("[6] Set API Key (for services that require it)")
-    console.print("[7] Back")
+    console.print("[7] Voice Note Format")
+    console.print("[8] Back")
     
-    choice = Prompt.ask("Choose an option", choices=["1", "2", "3", "4", "5", "6", "7"], default="1")
+    choice = Prompt.ask("Choose an option", choices=["1", "2", "3", "4", "5", "6", "7", "8"], default="1")
     
     if choice == "1":
         enabled = Prompt.ask("Enable voice commands?", choices=["y", "n"], default="y" if config.get("enabled", True) else "n")
@@ -794,6 +1176,13 @@ def configure_voice_commands():
         api_key = Prompt.ask("Enter API key (for services that require it)", password=True)
         config["api_key"] = api_key
     elif choice == "7":
+        console.print("\n[bold cyan]Voice Note Formats:[/bold cyan]")
+        console.print("[1] WAV 44.1 kHz (default, ~5 MB per minute)")
+        console.print("[2] WAV 16 kHz (~1.9 MB per minute)")
+        console.print("[3] FLAC 16 kHz (smallest, requires soundfile)")
+        fmt_choice = Prompt.ask("Choose a format", choices=["1", "2", "3"], default="1")
+        config["voice_note_format"] = {"1": "wav", "2": "wav16k", "3": "flac"}[fmt_choice]
+    elif choice == "8":
         return
     
     save_voice_commands_config(config)
@@ -810,18 +1199,18 @@ def voice_commands_menu():
         console.print("[4] Voice-to-Text Goal Setting")
         console.print("[5] Voice Mood Logging")
         console.print("[6] Configure Voice Commands")
-        console.print("[7] Back to Main Menu")
+        console.print("[7] Audio Latency Report")
+        console.print("[8] Transcribe Voice Note Archive (offline)")
+        console.print("[9] Back to Main Menu")
         
-        choice = Prompt.ask("Choose an option", choices=["1", "2", "3", "4", "5", "6", "7"], default="1")
+        choice = Prompt.ask("Choose an option", choices=["1", "2", "3", "4", "5", "6", "7", "8", "9"], default="1")
         
         if choice == "1":
             if check_speech_recognition():
                 console.print("[cyan]Speak after the beep to test voice recognition...[/cyan]")
-                sd.play(np.sin(2 * np.pi * 440 * np.arange(44100) / 44100)[:4410].astype(np.float32), 44100)
-                sd.wait()
-                audio_file = record_audio(duration=5)
-                text = transcribe_audio(audio_file) if audio_file else ""
-                os.unlink(audio_file)
+                get_audio_session().cue()
+                audio = record_audio(duration=5)
+                text = transcribe_audio(audio) if audio else ""
                 
                 if text:
                     console.print(f"[green]Recognized: {text}[/green]")
@@ -838,4 +1227,10 @@ def voice_commands_menu():
         elif choice == "6":
             configure_voice_commands()
         elif choice == "7":
+            show_latency_report()
+        elif choice == "8":
+            from ui.voice_notes import transcribe_voice_notes
+            transcribe_voice_notes()
+        elif choice == "9":
+            get_audio_session().release()
             break
\ No newline at end of file
@@ -0,0 +1,215 @@
+from rich.console import Console
+from rich.progress import Progress
+from math import gcd
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import os
+import re
+import json
+import wave
+
+console = Console()
+
+VOICE_NOTES_DIR = os.path.expanduser("~/.standlog/voice_notes")
+# format name -> (sample rate, file extension)
+VOICE_NOTE_FORMATS = {
+    "wav": (44100, ".wav"),
+    "wav16k": (16000, ".wav"),
+    "flac": (16000, ".flac"),
+}
+DEFAULT_VOICE_NOTE_FORMAT = "wav"
+VOICE_NOTE_EXTENSIONS = (".flac", ".wav")
+PLAYBACK_BLOCK_FRAMES = 4096
+NOTE_FILE_RE = re.compile(r'(\d{4}-\d{2}-\d{2})\.(wav|flac)$')
+# note filename -> {"mtime_ns", "size", "status"} for notes the archive job has processed
+TRANSCRIPTION_CHECKPOINT_PATH = os.path.join(VOICE_NOTES_DIR, ".transcription_checkpoint.json")
+
+
+def get_voice_note_format():
+    """The voice note format chosen in the voice settings"""
+    from ui.voice import load_voice_commands_config
+    fmt = load_voice_commands_config().get("voice_note_format", DEFAULT_VOICE_NOTE_FORMAT)
+    return fmt if fmt in VOICE_NOTE_FORMATS else DEFAULT_VOICE_NOTE_FORMAT
+
+
+def _soundfile():
+    """The soundfile module, or None: FLAC support is optional and falls back to 16 kHz WAV"""
+    try:
+        import soundfile
+    except ImportError:
+        return None
+    return soundfile
+
+
+def resample(samples, fs, target_fs):
+    """Polyphase-resample mono int16 samples to target_fs"""
+    if fs == target_fs:
+        return samples
+    import numpy as np
+    from scipy.signal import resample_poly
+    factor = gcd(fs, target_fs)
+    resampled = resample_poly(samples.astype(np.float32), target_fs // factor, fs // factor)
+    return np.clip(resampled, -32768, 32767).astype(np.int16)
+
+
+def _note_base(log_path):
+    return os.path.join(VOICE_NOTES_DIR, os.path.basename(log_path).replace('.json', ''))
+
+
+def find_voice_note(log_path, entry=None):
+    """Path of the voice note attached to a log, or None"""
+    if entry and entry.get("voice_note") and os.path.exists(entry["voice_note"]):
+        return entry["voice_note"]
+    base = _note_base(log_path)
+    for ext in VOICE_NOTE_EXTENSIONS:
+        if os.path.exists(base + ext):
+            return base + ext
+    return None
+
+
+def save_voice_note(log_path, samples, fs, fmt=None):
+    """Encode a mono int16 recording next to the log's other voice notes and return its path"""
+    import numpy as np
+    fmt = fmt or get_voice_note_format()
+    soundfile = _soundfile()
+    if fmt == "flac" and soundfile is None:
+        console.print("[yellow]soundfile is not installed; saving the voice note as 16 kHz WAV instead of FLAC.[/yellow]")
+        fmt = "wav16k"
+    target_fs, ext = VOICE_NOTE_FORMATS[fmt]
+    samples = resample(np.asarray(samples, dtype=np.int16).reshape(-1), fs, target_fs)
+    os.makedirs(VOICE_NOTES_DIR, exist_ok=True)
+    dest = _note_base(log_path) + ext
+    if ext == ".flac":
+        soundfile.write(dest, samples, target_fs, format="FLAC", subtype="PCM_16")
+    else:
+        with wave.open(dest, "wb") as f:
+            f.setnchannels(1)
+            f.setsampwidth(2)
+            f.setframerate(target_fs)
+            f.writeframes(samples.tobytes())
+    # Re-recording in another format must not leave the old note behind
+    for other in VOICE_NOTE_EXTENSIONS:
+        if other != ext and os.path.exists(_note_base(log_path) + other):
+            os.remove(_note_base(log_path) + other)
+    return dest
+
+
+def iter_voice_note_blocks(path, frames=PLAYBACK_BLOCK_FRAMES):
+    """Yield (sample rate, channels) first, then int16 blocks of shape (n, channels)"""
+    import numpy as np
+    if path.endswith(".flac"):
+        soundfile = _soundfile()
+        info = soundfile.info(path)
+        yield info.samplerate, info.channels
+        for block in soundfile.blocks(path, blocksize=frames, dtype="int16", always_2d=True):
+            yield block
+        return
+    with wave.open(path, "rb") as f:
+        channels = f.getnchannels()
+        yield f.getframerate(), channels
+        while True:
+            data = f.readframes(frames)
+            if not data:
+                break
+            yield np.frombuffer(data, dtype=np.int16).reshape(-1, channels)
+
+
+def play_voice_note_file(path):
+    """Stream a voice note to the speakers block by block, starting immediately"""
+    import sounddevice as sd
+    blocks = iter_voice_note_blocks(path)
+    fs, channels = next(blocks)
+    with sd.OutputStream(samplerate=fs, channels=channels, dtype="int16") as stream:
+        for block in blocks:
+            stream.write(block)
+
+
+def load_voice_note_samples(path):
+    """Read a whole voice note as (mono int16 samples, sample rate)"""
+    import numpy as np
+    if path.endswith(".flac"):
+        samples, fs = _soundfile().read(path, dtype="int16", always_2d=True)
+    else:
+        with wave.open(path, "rb") as f:
+            fs = f.getframerate()
+            samples = np.frombuffer(f.readframes(f.getnframes()), dtype=np.int16).reshape(-1, f.getnchannels())
+    return samples[:, 0], fs
+
+
+def _transcribe_note(path, language):
+    """Worker: transcribe one note offline with Sphinx, returning (path, text, error)"""
+    try:
+        import numpy as np
+        import speech_recognition as sr
+        samples, fs = load_voice_note_samples(path)
+        audio = sr.AudioData(np.ascontiguousarray(samples).tobytes(), fs, 2)
+        try:
+            return path, sr.Recognizer().recognize_sphinx(audio, language=language).lower(), None
+        except sr.UnknownValueError:
+            return path, "", None
+    except Exception as e:
+        return path, None, f"{type(e).__name__}: {e}"
+
+
+def _available_cores():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def _note_signature(path):
+    stat = os.stat(path)
+    return {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+
+
+def transcribe_voice_notes(workers=None):
+    """Transcribe every voice note not yet processed, resuming from the checkpoint"""
+    from ui.storage import read_json, write_json, write_bytes
+    from ui.index import transcript_path, index_entry, DATA_DIR
+    from ui.viewer import encrypt_data, load_entry
+    from ui.voice import load_voice_commands_config
+    if not os.path.exists(VOICE_NOTES_DIR):
+        console.print("[yellow]No voice notes recorded yet.[/yellow]")
+        return
+    checkpoint = read_json(TRANSCRIPTION_CHECKPOINT_PATH, {})
+    pending = []
+    for name in sorted(os.listdir(VOICE_NOTES_DIR)):
+        if not NOTE_FILE_RE.match(name):
+            continue
+        path = os.path.join(VOICE_NOTES_DIR, name)
+        done = checkpoint.get(name)
+        if done and done.get("status") != "error" and {k: done[k] for k in ("mtime_ns", "size")} == _note_signature(path):
+            continue
+        pending.append(path)
+    if not pending:
+        console.print("[green]All voice notes are already transcribed.[/green]")
+        return
+    language = load_voice_commands_config().get("language", "en-US")
+    workers = workers or min(_available_cores(), len(pending))
+    console.print(f"[cyan]Transcribing {len(pending)} voice notes with {workers} worker(s)...[/cyan]")
+    counts = {"transcribed": 0, "empty": 0, "error": 0}
+    with Progress() as progress, ProcessPoolExecutor(max_workers=workers) as pool:
+        task = progress.add_task("[cyan]Transcribing...[/cyan]", total=len(pending))
+        futures = [pool.submit(_transcribe_note, path, language) for path in pending]
+        for future in as_completed(futures):
+            path, text, error = future.result()
+            name = os.path.basename(path)
+            entry_file = NOTE_FILE_RE.match(name).group(1) + ".json"
+            if error is not None:
+                status = "error"
+                progress.console.print(f"[yellow]Could not transcribe {name}: {error}[/yellow]")
+            else:
+                status = "transcribed" if text else "empty"
+                record = {"note": name, "engine": "sphinx", "language": language, "text": text}
+                write_bytes(transcript_path(entry_file), encrypt_data(json.dumps(record, indent=2)))
+                if os.path.exists(os.path.join(DATA_DIR, entry_file)):
+                    entry = load_entry(entry_file)
+                    if isinstance(entry, dict):
+                        index_entry(entry_file, entry)
+            counts[status] += 1
+            # Checkpoint after every note so an interrupted run resumes where it stopped
+            checkpoint[name] = dict(_note_signature(path), status=status)
+            write_json(TRANSCRIPTION_CHECKPOINT_PATH, checkpoint)
+            progress.advance(task)
+    console.print(f"[green]Transcribed {counts['transcribed']} notes[/green] "
+                  f"([dim]{counts['empty']} without recognizable speech, {counts['error']} failed[/dim])")